@@ -0,0 +1,26 @@
+"""Crash-safe file writes.
+
+The owner snapshot, the metadata cache and the backfill output are read back
+on the next start; `atomic_write` writes them to a temporary file moved over
+the target only once complete, so a crash never leaves a torn file behind.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w") -> Iterator[IO]:
+    """Open a temporary file that replaces *path* once the block exits
+    cleanly; on an error *path* is left as it was."""
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, mode) as fh:
+            yield fh
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,282 @@
+"""Scan past blocks for ``schedule_swap_coldkey`` and the reserve moves around them.
+
+    python backfill.py 4000000 4100000 --out backfill --concurrency 32
+
+Blocks are fetched with at most ``--concurrency`` requests in flight and run
+through the same call-index prefilter and decoder as the live listener (each
+block against the runtime it was produced under; metadata comes from the
+on-disk cache).  The runtime version is read only at the ends of each chunk,
+and bisected between them when a runtime upgrade falls inside it.  Only swaps
+the block's events report as ``ExtrinsicSuccess`` are kept.  For every swap,
+and every subnet the signer owned at the parent block, the
+``SubnetTAO``/``SubnetAlphaIn`` reserves at the parent (before) and at the
+block (after) are read.
+
+Results go to ``<out>/swaps_<first>_<last>.npz``, one columnar chunk per
+``--chunk`` blocks, and ``<out>/checkpoint.json`` records the next block to
+scan, so an interrupted run resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import time
+
+import numpy as np
+from scalecodec.utils.ss58 import ss58_encode
+
+import config
+import inclusion
+import owners
+import rpc
+import runtime
+import storage
+from atomic import atomic_write
+from extrinsic_filter import hex_to_bytes
+from dedupe import extrinsic_hash
+from helpers import decode_if_candidate, storage_key
+
+COLUMNS = {
+    "block": np.int64,
+    "extrinsic_index": np.int32,
+    "netuid": np.int32,          # -1 when the signer owned no subnet
+    "tao_before": np.uint64,
+    "alpha_before": np.uint64,
+    "tao_after": np.uint64,
+    "alpha_after": np.uint64,
+    "xt_hash": "U66",
+    # SS58 of a 32-byte account: 48 characters, 49 for two-byte prefixes
+    "signer": "U49",
+    "new_coldkey": "U49",
+}
+
+
+def ss58(address: str | None) -> str:
+    """*address* as SS58, whether decoded as SS58 already or as 0x-hex."""
+    if not address:
+        return ""
+    if address.startswith("0x"):
+        return ss58_encode(bytes.fromhex(address[2:]), config.SS58_FORMAT)
+    return address
+
+
+class Scanner:
+    def __init__(self, concurrency: int) -> None:
+        self._limit = asyncio.Semaphore(concurrency)
+        self._runtimes: dict[int, runtime.Runtime] = {}
+        self._loading: dict[int, asyncio.Task] = {}
+        # Blocks whose runtime version has been read: number -> (version, hash)
+        self._versions: dict[int, tuple[dict, str]] = {}
+        self._probed: list[int] = []  # sorted keys of `_versions`
+        self._probing: dict[int, asyncio.Task] = {}
+
+    async def _request(self, method: str, params: list):
+        async with self._limit:
+            return await rpc.client.request(method, params)
+
+    async def probe(self, number: int) -> None:
+        """Read the runtime version of block *number* (once)."""
+        if number in self._versions:
+            return
+        if number not in self._probing:
+            self._probing[number] = asyncio.create_task(self._probe(number))
+        try:
+            await self._probing[number]
+        finally:
+            self._probing.pop(number, None)
+
+    async def _probe(self, number: int) -> None:
+        block_hash = await self._request("chain_getBlockHash", [number])
+        version = await self._request("state_getRuntimeVersion", [block_hash])
+        self._versions[number] = (version, block_hash)
+        bisect.insort(self._probed, number)
+
+    async def _version_at(self, number: int) -> tuple[dict, str]:
+        """Runtime version in force at block *number*, plus the hash of a block
+        under it.  Spec versions only go up, so a block between two probed
+        blocks of the same spec shares it; otherwise the gap is bisected."""
+        while True:
+            i = bisect.bisect_right(self._probed, number)
+            lo = self._probed[i - 1] if i else None
+            if lo == number:
+                return self._versions[lo]
+            hi = self._probed[i] if i < len(self._probed) else None
+            if lo is None or hi is None:
+                await self.probe(number)
+            elif self._versions[lo][0]["specVersion"] == self._versions[hi][0]["specVersion"]:
+                return self._versions[lo]
+            else:
+                await self.probe((lo + hi) // 2)
+
+    async def _runtime_at(self, number: int) -> runtime.Runtime:
+        version, block_hash = await self._version_at(number)
+        spec = version["specVersion"]
+        if spec not in self._runtimes:
+            # Blocks of a new spec arrive together; load its metadata once
+            if spec not in self._loading:
+                self._loading[spec] = asyncio.create_task(runtime.build(version, block_hash))
+            try:
+                self._runtimes[spec] = await self._loading[spec]
+            except Exception:
+                self._loading.pop(spec, None)  # let the next block retry
+                raise
+        return self._runtimes[spec]
+
+    async def _reserves(self, netuids: list[int], at: str) -> dict[int, tuple[int, int]]:
+        keys = {
+            netuid: (
+                storage_key("SubtensorModule", "SubnetTAO", storage.netuid_key(netuid)),
+                storage_key("SubtensorModule", "SubnetAlphaIn", storage.netuid_key(netuid)),
+            )
+            for netuid in netuids
+        }
+        async with self._limit:
+            values = await storage.read_values([k for pair in keys.values() for k in pair], at)
+        return {
+            netuid: (storage.decode_int(values[tao]), storage.decode_int(values[alpha]))
+            for netuid, (tao, alpha) in keys.items()
+        }
+
+    async def scan_block(self, number: int) -> list[dict]:
+        block_hash = await self._request("chain_getBlockHash", [number])
+        block, rt = await asyncio.gather(
+            self._request("chain_getBlock", [block_hash]), self._runtime_at(number)
+        )
+        try:
+            targets = {rt.call_index("SubtensorModule", "schedule_swap_coldkey")}
+        except KeyError:
+            return []  # runtime predates the call, so the block has no swaps
+        swaps = []
+        for i, hx in enumerate(block["block"]["extrinsics"]):
+            raw = hex_to_bytes(hx)
+            value = decode_if_candidate(hx, targets, raw, rt)
+            if value is None or value["call"]["call_function"] != "schedule_swap_coldkey":
+                continue
+            args = {a["name"]: a["value"] for a in value["call"]["call_args"]}
+            swaps.append((i, raw, ss58(value.get("address")), ss58(args.get("new_coldkey"))))
+        if not swaps:
+            return []
+
+        # A failed call scheduled nothing; keep only the swaps that went through
+        async with self._limit:
+            results = await inclusion.read_outcomes(block_hash, rt)
+        swaps = [swap for swap in swaps if results.get(swap[0], (False,))[0]]
+        if not swaps:
+            return []
+
+        parent = block["block"]["header"]["parentHash"]
+        async with self._limit:
+            index = owners.build_index(await owners.fetch_owners(parent))
+        rows = []
+        for i, raw, signer, new_coldkey in swaps:
+            netuids = index.get(signer, [])
+            before, after = await asyncio.gather(
+                self._reserves(netuids, parent), self._reserves(netuids, block_hash)
+            )
+            for netuid in netuids or [-1]:
+                tao_before, alpha_before = before.get(netuid, (0, 0))
+                tao_after, alpha_after = after.get(netuid, (0, 0))
+                rows.append(
+                    {
+                        "block": number,
+                        "extrinsic_index": i,
+                        "netuid": netuid,
+                        "tao_before": tao_before,
+                        "alpha_before": alpha_before,
+                        "tao_after": tao_after,
+                        "alpha_after": alpha_after,
+                        "xt_hash": f"0x{extrinsic_hash(raw).hex()}",
+                        "signer": signer,
+                        "new_coldkey": new_coldkey,
+                    }
+                )
+        return rows
+
+
+def write_chunk(path: str, rows: list[dict]) -> None:
+    with atomic_write(path, "wb") as fh:
+        np.savez_compressed(
+            fh,
+            **{
+                name: np.array([row[name] for row in rows], dtype=dtype)
+                for name, dtype in COLUMNS.items()
+            },
+        )
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    with atomic_write(path) as fh:
+        json.dump(state, fh)
+
+
+def load_results(out: str) -> dict[str, np.ndarray]:
+    """Concatenate every chunk in *out* into one set of columns."""
+    chunks = sorted(f for f in os.listdir(out) if f.startswith("swaps_") and f.endswith(".npz"))
+    loaded = [np.load(os.path.join(out, f)) for f in chunks]
+    return {
+        name: np.concatenate([c[name] for c in loaded]) if loaded else np.array([], dtype=dtype)
+        for name, dtype in COLUMNS.items()
+    }
+
+
+async def backfill(start: int, end: int, out: str, concurrency: int, chunk: int) -> None:
+    os.makedirs(out, exist_ok=True)
+    checkpoint_path = os.path.join(out, "checkpoint.json")
+    state = load_checkpoint(checkpoint_path)
+    if state.get("start") == start and state.get("end") == end:
+        print(f"Resuming at block {state['next_block']}")
+    else:
+        state = {"start": start, "end": end, "next_block": start, "swaps": 0}
+
+    await rpc.client.start()
+    await runtime.load()
+    scanner = Scanner(concurrency)
+    began, scanned = time.perf_counter(), 0
+    while state["next_block"] <= end:
+        first = state["next_block"]
+        last = min(first + chunk - 1, end)
+        # Runtime versions at both ends cover every block between them
+        await asyncio.gather(scanner.probe(first), scanner.probe(last))
+        results = await asyncio.gather(
+            *(scanner.scan_block(n) for n in range(first, last + 1))
+        )
+        rows = [row for block_rows in results for row in block_rows]
+        if rows:
+            write_chunk(os.path.join(out, f"swaps_{first}_{last}.npz"), rows)
+        state["next_block"] = last + 1
+        state["swaps"] += len(rows)
+        save_checkpoint(checkpoint_path, state)
+
+        scanned += last - first + 1
+        rate = scanned / (time.perf_counter() - began) * 60
+        print(f"blocks {first}-{last}: {len(rows)} swap rows ({rate:,.0f} blocks/min)")
+    print(f"Done: {state['swaps']} swap rows in {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("start", type=int, help="first block")
+    parser.add_argument("end", type=int, help="last block (inclusive)")
+    parser.add_argument("--out", default="backfill", help="output directory")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="requests in flight")
+    parser.add_argument("--chunk", type=int, default=1000,
+                        help="blocks per output file and checkpoint")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.start, args.end, args.out, args.concurrency, args.chunk))
+
+
+if __name__ == "__main__":
+    main()
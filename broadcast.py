@@ -0,0 +1,149 @@
+"""Fan a signed extrinsic out to every configured RPC endpoint at once.
+
+Inclusion latency otherwise depends on where a single node sits in the gossip
+network.  Each endpoint gets its own persistent connection; results are
+deduplicated by extrinsic hash.  `node_stats` keeps, for every endpoint
+(the primary ``WS_URL`` included), its acknowledgement latency and how often
+what it accepted, or acknowledged first, made it into a block
+(`record_inclusion`), so slow or badly connected nodes can be spotted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import config
+import metrics
+import rpc
+
+# JSON-RPC error code for "Transaction Already Imported": another node got it
+# into this node's pool first, which for us counts as accepted.
+ALREADY_IMPORTED = 1013
+
+
+@dataclass(slots=True)
+class NodeStats:
+    url: str
+    submitted: int = 0
+    failed: int = 0
+    first_acks: int = 0  # times this node acknowledged before every other
+    included: int = 0    # accepted extrinsics that made it into a block
+    first_included: int = 0  # ... of those, the ones it acknowledged first
+    last_ms: float | None = None
+    total_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float | None:
+        ok = self.submitted - self.failed
+        return self.total_ms / ok if ok else None
+
+    @property
+    def inclusion_rate(self) -> float | None:
+        ok = self.submitted - self.failed
+        return self.included / ok if ok else None
+
+
+@dataclass(slots=True)
+class BroadcastResult:
+    extrinsic_hash: str
+    accepted_by: list[str] = field(default_factory=list)
+    errors: dict[str, Exception] = field(default_factory=dict)
+    first: str | None = None
+    acked_at: float | None = None  # perf_counter of the first acknowledgement
+
+    @property
+    def accepted(self) -> bool:
+        return bool(self.accepted_by)
+
+
+node_stats: dict[str, NodeStats] = {}
+_results: dict[str, BroadcastResult] = {}
+
+
+def _stats(url: str) -> NodeStats:
+    if url not in node_stats:
+        node_stats[url] = NodeStats(url)
+    return node_stats[url]
+
+
+for _url in config.RPC_ENDPOINTS:
+    _stats(_url)
+
+
+def _record_ack(url: str, start: float, result: BroadcastResult) -> None:
+    stats = _stats(url)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats.last_ms = elapsed_ms
+    stats.total_ms += elapsed_ms
+    if result.first is None:
+        result.first = url
+        result.acked_at = metrics.since("submit", start)
+        stats.first_acks += 1
+    result.accepted_by.append(url)
+
+
+async def _submit(url: str, xt_hex: str, result: BroadcastResult) -> None:
+    client = rpc.get(url)
+    stats = _stats(url)
+    stats.submitted += 1
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.start(), timeout=config.BROADCAST_TIMEOUT)
+        await client.request(
+            "author_submitExtrinsic", [xt_hex], timeout=config.BROADCAST_TIMEOUT
+        )
+    except rpc.RpcError as e:
+        if e.code != ALREADY_IMPORTED:
+            stats.failed += 1
+            result.errors[url] = e
+            return
+    except Exception as e:
+        stats.failed += 1
+        result.errors[url] = e
+        return
+    _record_ack(url, start, result)
+
+
+async def broadcast(
+    xt_hex: str, extrinsic_hash: str, *, exclude: tuple[str, ...] = ()
+) -> BroadcastResult:
+    """Submit *xt_hex* to every endpoint not in *exclude*, concurrently.
+
+    Calling again with the same *extrinsic_hash* returns the first result
+    instead of re-sending.
+    """
+    existing = _results.get(extrinsic_hash)
+    if existing is not None:
+        return existing
+    result = _results[extrinsic_hash] = BroadcastResult(extrinsic_hash)
+    urls = [url for url in config.RPC_ENDPOINTS if url not in exclude]
+    await asyncio.gather(*(_submit(url, xt_hex, result) for url in urls))
+    return result
+
+
+async def submit(xt_hex: str, extrinsic_hash: str) -> BroadcastResult:
+    """Send *xt_hex* to every endpoint at once; raises the primary's error
+    (or any other) when no endpoint accepted it.  Inclusion is followed by
+    `inclusion.tracker`, not per extrinsic."""
+    result = await broadcast(xt_hex, extrinsic_hash)
+    if not result.accepted:
+        _results.pop(extrinsic_hash, None)
+        raise result.errors.get(config.WS_URL) or next(iter(result.errors.values()))
+    return result
+
+
+def record_inclusion(result: BroadcastResult) -> None:
+    """Credit the nodes that accepted *result*'s extrinsic once
+    `inclusion.tracker` has seen it in a block."""
+    for url in result.accepted_by:
+        stats = _stats(url)
+        stats.included += 1
+        if url == result.first:
+            stats.first_included += 1
+
+
+def forget(extrinsic_hash: str) -> None:
+    """Drop the dedupe entry once the extrinsic is resolved."""
+    _results.pop(extrinsic_hash, None)
@@ -0,0 +1,40 @@
+"""Background jobs that only ever run for the newest request.
+
+Refreshes driven by block heads (reserves, the stake book, the signing head,
+balances, the owner map) must never queue up behind a slow read: a
+`Coalescer` runs its job in one background task, and requests made while a
+run is in flight replace each other, so only the newest is run once the
+current one finishes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+import config
+
+
+class Coalescer:
+    def __init__(self, name: str, job: Callable[..., Awaitable[None]]) -> None:
+        """*job(\\*args)* is awaited for the newest `schedule` call; its errors
+        are logged as ``[<name> Error]``."""
+        self.name = name
+        self._job = job
+        self._task: asyncio.Task | None = None
+        self._next: tuple | None = None
+
+    def schedule(self, *args) -> None:
+        """Run the job with *args* in the background, after the run in
+        flight if there is one (replacing any request still waiting)."""
+        self._next = args
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._next is not None:
+            args, self._next = self._next, None
+            try:
+                await self._job(*args)
+            except Exception as e:
+                config.logger.error("[%s Error] %s", self.name, e, exc_info=True)
@@ -35,6 +35,27 @@ def _getenv_int(name: str, *, default: int | None = None) -> int:
         raise RuntimeError(f"Environment variable {name} must be an int") from exc
 
 
+def _getenv_list(name: str, *, default: list[str]) -> list[str]:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _getenv_bool(name: str, *, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _getenv_float(name: str, *, default: float | None = None) -> float:
+    try:
+        return float(_getenv_str(name, default=str(default) if default is not None else None))
+    except ValueError as exc:
+        raise RuntimeError(f"Environment variable {name} must be a float") from exc
+
+
 # --------------------------------------------------------------------------- #
 # Required env vars
 # --------------------------------------------------------------------------- #
@@ -43,20 +64,93 @@ TG_CHAT_ID = _getenv_str("TG_CHAT_ID")
 WS_URL = _getenv_str("WS_URL")
 MNEMONIC = _getenv_str("MNEMONIC")
 
+# Further signing accounts (comma separated); stakes are spread over these and
+# MNEMONIC, each account with its own nonce sequence
+MNEMONICS = list(dict.fromkeys([MNEMONIC, *_getenv_list("MNEMONICS", default=[])]))
+
+# Extra RPC endpoints every signed stake is broadcast to (WS_URL is always
+# included and is the node reads start on)
+RPC_ENDPOINTS = list(dict.fromkeys([WS_URL, *_getenv_list("RPC_ENDPOINTS", default=[])]))
+BROADCAST_TIMEOUT = _getenv_float("BROADCAST_TIMEOUT", default=5.0)   # seconds
+
+# Nodes kept connected as hot standbys for reads (block and pool watching,
+# storage); the supervisor probes each and fails over from a stalled one
+READ_ENDPOINTS = list(dict.fromkeys([WS_URL, *_getenv_list("READ_ENDPOINTS", default=RPC_ENDPOINTS)]))
+PROBE_INTERVAL = _getenv_float("PROBE_INTERVAL", default=1.0)   # seconds
+PROBE_TIMEOUT = _getenv_float("PROBE_TIMEOUT", default=2.0)     # seconds
+MAX_HEAD_LAG = _getenv_int("MAX_HEAD_LAG", default=1)           # blocks behind the best node
+
 # Optional tuning knobs
 POLL_INTERVAL = _getenv_int("POLL_INTERVAL", default=5)   # seconds
 
+# Pending pool feed: "stream" takes entries as the node pushes them (falling back
+# to a fast diffing poll), "poll" keeps the plain POLL_INTERVAL loop.
+PENDING_FEED = _getenv_str("PENDING_FEED", default="stream")
+# Subscription method for nodes that push pool entries; stock Substrate nodes
+# have none, in which case stream mode degrades to the fast poll below.
+PENDING_SUBSCRIBE_METHOD = _getenv_str("PENDING_SUBSCRIBE_METHOD", default="")
+STREAM_POLL_INTERVAL = _getenv_float("STREAM_POLL_INTERVAL", default=0.2)   # seconds
+PENDING_QUEUE_SIZE = _getenv_int("PENDING_QUEUE_SIZE", default=20_000)
+
+# Decoder worker processes (0 decodes on the event loop); batches smaller than
+# DECODE_POOL_MIN_BATCH are decoded inline, where IPC would cost more than it saves
+DECODE_WORKERS = _getenv_int("DECODE_WORKERS", default=max((os.cpu_count() or 1) - 1, 0))
+DECODE_POOL_MIN_BATCH = _getenv_int("DECODE_POOL_MIN_BATCH", default=32)
+
 # Staking parameters
 STAKE_AMOUNT = 6 * 10 ** 9       # planck units
 TIP_AMOUNT = 1 * 10 ** 7
+FEE_RESERVE = _getenv_int("FEE_RESERVE", default=10 ** 8)   # planck kept free per order for fees
+ERA_PERIOD = _getenv_int("ERA_PERIOD", default=4)   # blocks a signed stake stays valid
+NONCE_RETRIES = 1   # re-signs after a Stale/Future nonce rejection
+MIN_POOL_ALPHA = 10 ** 15   # subnets with less alpha in the pool are not staked on
+# Stakes are cut to the largest size whose post-trade price fits SLIPPAGE;
+# below this size the subnet is skipped
+MIN_STAKE_AMOUNT = _getenv_int("MIN_STAKE_AMOUNT", default=10 ** 8)
+
+# Pre-signed stake book: sign a stake for every subnet on each new head so a
+# trigger is a lookup and a send (0 workers signs on the event loop)
+STAKE_BOOK = _getenv_bool("STAKE_BOOK", default=False)
+STAKE_BOOK_WORKERS = _getenv_int("STAKE_BOOK_WORKERS", default=max((os.cpu_count() or 1) - 1, 0))
 SLIPPAGE = Decimal("1.3")       # multiplier
 
 # Units
 NANO = 10 ** 9
 
+# Reserve cache: readings older than this many blocks are treated as missing
+RESERVE_MAX_AGE_BLOCKS = _getenv_int("RESERVE_MAX_AGE_BLOCKS", default=2)
+RESERVE_PAGE_SIZE = 512  # keys per page when reading the reserve/owner maps
+
+# Pending-extrinsic dedupe: entries expire this many blocks after they were
+# last seen; the cap bounds memory under a very large pool
+SEEN_TTL_BLOCKS = _getenv_int("SEEN_TTL_BLOCKS", default=256)
+SEEN_MAX_ENTRIES = _getenv_int("SEEN_MAX_ENTRIES", default=100_000)
+
+# Local metrics endpoint (set METRICS_PORT=0 to disable)
+METRICS_HOST = _getenv_str("METRICS_HOST", default="127.0.0.1")
+METRICS_PORT = _getenv_int("METRICS_PORT", default=9108)
+# Events buffered per /events subscriber before the oldest are dropped
+EVENT_BUFFER = _getenv_int("EVENT_BUFFER", default=1024)
+
+# Trigger rules (falls back to the built-in coldkey-swap rule when missing)
+RULES_PATH = _getenv_str("RULES_PATH", default="rules.yaml")
+
+# Order ledger (SQLite, WAL mode)
+ORDERS_DB_PATH = _getenv_str("ORDERS_DB_PATH", default="orders.sqlite3")
+
+# Runtime metadata cache, one file per spec version
+METADATA_CACHE_DIR = _getenv_str("METADATA_CACHE_DIR", default="metadata_cache")
+
+# Subnet owner index
+OWNER_SNAPSHOT_PATH = _getenv_str("OWNER_SNAPSHOT_PATH", default="subnet_owners.json")
+OWNER_REFRESH_BLOCKS = _getenv_int("OWNER_REFRESH_BLOCKS", default=10)
+SS58_FORMAT = 42
+
 # Misc
 VALIDATOR_HOTKEY = _getenv_str("VALIDATOR_HOTKEY", default="5GKH9FPPnWSUoeeTJp19wVtd84XqFW4pyK2ijV2GsFbhTrP1")
 TELEGRAM_URL = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+TG_QUEUE_SIZE = _getenv_int("TG_QUEUE_SIZE", default=1000)           # pending notifications
+TG_BATCH_WINDOW = _getenv_float("TG_BATCH_WINDOW", default=0.5)      # seconds to gather a burst
 
 # --------------------------------------------------------------------------- #
 # Logging
@@ -72,19 +166,24 @@ logger = logging.getLogger("subtensor-bot")
 # --------------------------------------------------------------------------- #
 # Runtime globals (mutable)
 # --------------------------------------------------------------------------- #
-seen_this_block: set[str] = set()
-subnet_coldkeys: dict[str, int] = {}
-subnet_count: int = 128
+current_block: int | None = None
+subnet_owners: dict[int, str] = {}            # netuid -> owner coldkey
+subnet_coldkeys: dict[str, list[int]] = {}    # owner coldkey -> netuids
 
 # Track reconnect attempts for throttling
 reconnect_attempts: list[float] = []
 
 
 def record_reconnect_attempt() -> None:
-    """Remember a reconnect attempt timestamp (called from listener.safe_connect)."""
+    """Remember a reconnect attempt timestamp (called from rpc.RpcClient on connect)."""
     reconnect_attempts.append(time.monotonic())
-    # keep only last minute
+    recent_reconnect_attempts()
+
+
+def recent_reconnect_attempts() -> int:
+    """Reconnect attempts in the last minute, dropping older ones."""
     horizon = time.monotonic() - 60
     while reconnect_attempts and reconnect_attempts[0] < horizon:
         reconnect_attempts.pop(0)
+    return len(reconnect_attempts)
 
@@ -0,0 +1,132 @@
+"""Fan pending-extrinsic decoding out to a pool of worker processes.
+
+scalecodec is pure Python, so a pool burst decoded on the event loop thread
+starves the block watcher and the submission path.  Each worker loads the
+runtime metadata once (in its initializer), then runs the call-index prefilter
+and full decode over whole batches; only decoded candidates travel back.
+Results are returned in submission order.
+
+This module must stay free of side effects at import time: workers are
+started with the ``spawn`` method and import it fresh.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from extrinsic_filter import hex_to_bytes, peek_call_index
+
+# Per-worker state set by `_init_worker`
+_runtime = None
+
+
+def load_runtime(metadata_hex: str, ss58_format: int):
+    """Decode raw ``state_getMetadata`` output into ``(runtime_config, metadata)``.
+
+    Account ids decode to SS58 addresses in *ss58_format*, the form the owner
+    index compares them in.
+    """
+    from scalecodec.base import RuntimeConfigurationObject, ScaleBytes
+    from scalecodec.type_registry import load_type_registry_preset
+
+    runtime_config = RuntimeConfigurationObject(
+        implements_scale_info=True, ss58_format=ss58_format
+    )
+    runtime_config.update_type_registry(load_type_registry_preset(name="core"))
+    metadata = runtime_config.create_scale_object(
+        "MetadataVersioned", data=ScaleBytes(metadata_hex)
+    )
+    metadata.decode()
+    runtime_config.add_portable_registry(metadata)
+    return runtime_config, metadata
+
+
+def decode_value(runtime_config, metadata, hex_string: str) -> dict:
+    from scalecodec.base import ScaleBytes
+
+    xt = runtime_config.create_scale_object(
+        "Extrinsic", data=ScaleBytes(hex_string), metadata=metadata
+    )
+    xt.decode()
+    return xt.value
+
+
+def _init_worker(metadata_hex: str, ss58_format: int, layout, targets) -> None:
+    global _runtime
+    runtime_config, metadata = load_runtime(metadata_hex, ss58_format)
+    _runtime = (runtime_config, metadata, layout, frozenset(targets))
+
+
+def _decode_batch(hexes: list[str]) -> list[dict | str | None]:
+    """Decode the candidates in *hexes*; non-candidates map to ``None`` and
+    decode failures to their error message."""
+    runtime_config, metadata, layout, targets = _runtime
+    out: list[dict | str | None] = []
+    for hx in hexes:
+        index = peek_call_index(hex_to_bytes(hx), layout)
+        if index is not None and index not in targets:
+            out.append(None)
+            continue
+        try:
+            out.append(decode_value(runtime_config, metadata, hx))
+        except Exception as e:
+            out.append(f"{type(e).__name__}: {e}")
+    return out
+
+
+def _ping() -> bool:
+    return True
+
+
+class DecoderPool:
+    def __init__(self, workers: int, metadata_hex: str, ss58_format: int, layout,
+                 targets, chunk_size: int = 64) -> None:
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._started: asyncio.Task | None = None
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(metadata_hex, ss58_format, layout, tuple(targets)),
+        )
+
+    def start(self) -> asyncio.Task:
+        """Spawn the workers and load the metadata into them in the background
+        (once); `ready` turns true when every worker has answered."""
+        if self._started is None:
+            self._started = asyncio.create_task(self._start())
+        return self._started
+
+    async def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers))
+        )
+
+    @property
+    def ready(self) -> bool:
+        started = self._started
+        return (
+            started is not None
+            and started.done()
+            and not started.cancelled()
+            and started.exception() is None
+        )
+
+    async def decode(self, hexes: list[str]) -> list[dict | str | None]:
+        """Decode *hexes* across the workers; the result lines up with *hexes*."""
+        loop = asyncio.get_running_loop()
+        chunks = [
+            hexes[i : i + self.chunk_size] for i in range(0, len(hexes), self.chunk_size)
+        ]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _decode_batch, c) for c in chunks)
+        )
+        return [value for chunk in results for value in chunk]
+
+    def shutdown(self) -> None:
+        """Stop accepting work; batches already submitted still complete."""
+        self._executor.shutdown(wait=False)
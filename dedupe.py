@@ -0,0 +1,70 @@
+"""Cross-block dedupe cache for pending extrinsics.
+
+Entries are keyed by the 32-byte extrinsic hash (blake2b-256 of the encoded
+extrinsic, the same hash the node reports) rather than by the full hex string,
+expire a fixed number of blocks after they were last seen, and are capped in
+number with least-recently-seen eviction, so memory stays flat however large
+the pool gets.  Entries seen before the first head have no block to count
+from; their expiry is set from the first block passed to `expire`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+
+
+def extrinsic_hash(raw: bytes) -> bytes:
+    return hashlib.blake2b(raw, digest_size=32).digest()
+
+
+class SeenCache:
+    def __init__(self, ttl_blocks: int, max_entries: int) -> None:
+        self.ttl_blocks = ttl_blocks
+        self.max_entries = max_entries
+        # hash -> expiry block (None until a head is known); ordered by last
+        # sighting, so also by expiry
+        self._entries: OrderedDict[bytes, int | None] = OrderedDict()
+        self._unstamped = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._entries
+
+    def add(self, key: bytes, block: int | None) -> bool:
+        """Record a sighting of *key* at *block* (``None`` before the first
+        head); ``True`` if it was new."""
+        if block is None:
+            expiry = None
+            self._unstamped = True
+        else:
+            expiry = block + self.ttl_blocks
+        if key in self._entries:
+            self._entries[key] = expiry
+            self._entries.move_to_end(key)
+            return False
+        self._entries[key] = expiry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def discard(self, key: bytes) -> None:
+        """Forget *key* so its next sighting is processed again."""
+        self._entries.pop(key, None)
+
+    def expire(self, block: int) -> None:
+        """Drop every entry whose expiry is at or before *block*."""
+        entries = self._entries
+        if self._unstamped:
+            # Seen before any head: count their lifetime from this one
+            for key, expiry in entries.items():
+                if expiry is None:
+                    entries[key] = block + self.ttl_blocks
+            self._unstamped = False
+        while entries:
+            key, expiry = next(iter(entries.items()))
+            if expiry > block:
+                break
+            del entries[key]
@@ -0,0 +1,145 @@
+"""Push detection, order and inclusion events to local subscribers.
+
+`publish` serialises an event once and appends it to every subscriber's
+bounded buffer (``EVENT_BUFFER`` entries).  A subscriber that cannot keep up
+loses its oldest events rather than holding anyone up, so publishing never
+awaits and costs the listener one append per subscriber.  Every event has a
+``seq``, so a consumer can spot gaps.  Subscribers connect over the metrics
+server:
+
+    GET /events              server-sent events
+    WS  /events/ws           one JSON text frame per event
+
+Both accept ``?types=detection,order`` to receive only some event types.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+
+import config
+import metrics
+
+# Event types
+DETECTION = "detection"    # a decoded pool extrinsic matched a rule
+ORDER = "order"            # a ledger order was opened or changed status
+INCLUSION = "inclusion"    # a tracked extrinsic landed in a block or expired
+
+
+class Subscriber:
+    def __init__(self, types: frozenset[str] | None = None,
+                 maxlen: int = config.EVENT_BUFFER) -> None:
+        self.types = types
+        self.dropped = 0
+        self._buffer: deque[str] = deque(maxlen=maxlen)
+        self._ready = asyncio.Event()
+
+    def _push(self, kind: str, payload: str) -> None:
+        if self.types is not None and kind not in self.types:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1  # deque drops the oldest on append
+        self._buffer.append(payload)
+        self._ready.set()
+
+    async def get(self) -> str:
+        """Next buffered event as JSON, waiting for one if needed."""
+        while not self._buffer:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._buffer.popleft()
+
+
+_subscribers: set[Subscriber] = set()
+_seq = itertools.count(1)
+_dropped = 0  # by subscribers that have since gone
+
+
+def subscribe(types: frozenset[str] | None = None) -> Subscriber:
+    subscriber = Subscriber(types)
+    _subscribers.add(subscriber)
+    return subscriber
+
+
+def unsubscribe(subscriber: Subscriber) -> None:
+    global _dropped
+    if subscriber in _subscribers:
+        _subscribers.discard(subscriber)
+        _dropped += subscriber.dropped
+
+
+def publish(kind: str, **data) -> None:
+    """Queue event *kind* with fields *data* for every subscriber."""
+    if not _subscribers:
+        return
+    payload = json.dumps(
+        {"type": kind, "seq": next(_seq), "ts": time.time(), **data}, default=str
+    )
+    for subscriber in _subscribers:
+        subscriber._push(kind, payload)
+
+
+def _parse_types(types: str | None) -> frozenset[str] | None:
+    if not types:
+        return None
+    return frozenset(t.strip() for t in types.split(",") if t.strip())
+
+
+def add_routes(app) -> None:
+    from fastapi import WebSocketDisconnect
+    from fastapi.responses import StreamingResponse
+
+    async def event_stream(request):
+        subscriber = subscribe(_parse_types(request.query_params.get("types")))
+
+        async def stream():
+            try:
+                while True:
+                    yield f"data: {await subscriber.get()}\n\n"
+            finally:
+                unsubscribe(subscriber)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def event_socket(websocket) -> None:
+        await websocket.accept()
+        subscriber = subscribe(_parse_types(websocket.query_params.get("types")))
+
+        async def send():
+            while True:
+                await websocket.send_text(await subscriber.get())
+
+        sender = asyncio.create_task(send())
+        try:
+            # Reading is how a disconnect shows up while no event is due
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            sender.cancel()
+            try:
+                # Collect it, or a send that failed on the closed socket is
+                # reported as a never-retrieved task exception
+                await sender
+            except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+                pass
+            unsubscribe(subscriber)
+
+    app.add_route("/events", event_stream, methods=["GET"])
+    app.add_websocket_route("/events/ws", event_socket)
+
+
+metrics.register_routes(add_routes)
+metrics.register_gauge("event_subscribers", lambda: len(_subscribers))
+metrics.register_gauge(
+    "events_dropped", lambda: _dropped + sum(s.dropped for s in _subscribers)
+)
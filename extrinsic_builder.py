@@ -0,0 +1,130 @@
+"""Build signed extrinsics from a runtime config and metadata, with no I/O.
+
+Shared by `signing.SigningContext` on the event loop and the stake-book
+signing workers (`init_worker` / `sign_calls`), so it must stay free of side
+effects at import time.
+"""
+
+from __future__ import annotations
+
+from hashlib import blake2b
+
+# (signed extension, payload field) in the order substrate expects them
+_EXTRA_FIELDS = (
+    ("CheckMortality", "era"),
+    ("CheckEra", "era"),
+    ("CheckNonce", "nonce"),
+    ("ChargeTransactionPayment", "tip"),
+    ("CheckMetadataHash", "mode"),
+)
+_ADDITIONAL_FIELDS = (
+    ("CheckSpecVersion", "spec_version"),
+    ("CheckTxVersion", "transaction_version"),
+    ("CheckGenesis", "genesis_hash"),
+    ("CheckMortality", "block_hash"),
+    ("CheckEra", "block_hash"),
+    ("CheckMetadataHash", "metadata_hash"),
+)
+
+
+def compose_call(runtime_config, metadata, module: str, function: str, params: dict):
+    call = runtime_config.create_scale_object("Call", metadata=metadata)
+    call.encode({"call_module": module, "call_function": function, "call_args": params})
+    return call
+
+
+def signature_payload(runtime_config, metadata, call, *, era: dict, nonce: int,
+                      tip: int, spec_version: int, transaction_version: int,
+                      genesis_hash: str, block_hash: str) -> bytes:
+    """The bytes to sign for *call* (hashed when longer than 256 bytes)."""
+    payload = runtime_config.create_scale_object("ExtrinsicPayloadValue")
+    extensions = metadata.get_signed_extensions()
+    mapping = [["call", "CallBytes"]]
+    for name, field in _EXTRA_FIELDS:
+        if name in extensions:
+            mapping.append([field, extensions[name]["extrinsic"]])
+    for name, field in _ADDITIONAL_FIELDS:
+        if name in extensions:
+            mapping.append([field, extensions[name]["additional_signed"]])
+    payload.type_mapping = mapping
+    payload.encode(
+        {
+            "call": str(call.data),
+            "era": era,
+            "nonce": nonce,
+            "tip": tip,
+            "mode": "Disabled",
+            "spec_version": spec_version,
+            "transaction_version": transaction_version,
+            "genesis_hash": genesis_hash,
+            "block_hash": block_hash,
+            "metadata_hash": None,
+        }
+    )
+    data = bytes(payload.data.data)  # sr25519 signing rejects bytearray
+    return blake2b(data, digest_size=32).digest() if len(data) > 256 else data
+
+
+def signed_extrinsic(runtime_config, metadata, keypair, call, *, era: dict,
+                     nonce: int, tip: int, spec_version: int,
+                     transaction_version: int, genesis_hash: str, block_hash: str):
+    """Sign *call* with *keypair* and return the encoded ``Extrinsic``."""
+    signature = keypair.sign(
+        signature_payload(
+            runtime_config,
+            metadata,
+            call,
+            era=era,
+            nonce=nonce,
+            tip=tip,
+            spec_version=spec_version,
+            transaction_version=transaction_version,
+            genesis_hash=genesis_hash,
+            block_hash=block_hash,
+        )
+    )
+    extrinsic = runtime_config.create_scale_object("Extrinsic", metadata=metadata)
+    extrinsic.encode(
+        {
+            "account_id": f"0x{keypair.public_key.hex()}",
+            "signature_version": keypair.crypto_type,
+            "signature": f"0x{signature.hex()}",
+            "call_function": call.value["call_function"],
+            "call_module": call.value["call_module"],
+            "call_args": call.value["call_args"],
+            "nonce": nonce,
+            "era": era,
+            "tip": tip,
+            "mode": "Disabled",
+        }
+    )
+    return extrinsic
+
+
+# -- signing workers ------------------------------------------------------ #
+# Per-process state set by `init_worker`
+_worker = None
+
+
+def init_worker(metadata_hex: str, ss58_format: int, mnemonic: str) -> None:
+    from decoder_pool import load_runtime
+    from substrateinterface import Keypair
+
+    global _worker
+    runtime_config, metadata = load_runtime(metadata_hex, ss58_format)
+    _worker = (runtime_config, metadata, Keypair.create_from_mnemonic(mnemonic))
+
+
+def sign_calls(common: dict, calls: list[tuple]) -> list[tuple]:
+    """Sign ``(key, module, function, params)`` calls in a worker process.
+
+    *common* holds the `signed_extrinsic` keyword arguments shared by every
+    call; returns ``(key, extrinsic hex, extrinsic hash hex)`` in input order.
+    """
+    runtime_config, metadata, keypair = _worker
+    out = []
+    for key, module, function, params in calls:
+        call = compose_call(runtime_config, metadata, module, function, params)
+        xt = signed_extrinsic(runtime_config, metadata, keypair, call, **common)
+        out.append((key, str(xt.data), f"0x{xt.extrinsic_hash.hex()}"))
+    return out
@@ -0,0 +1,107 @@
+"""Byte-level peek at an extrinsic's call index, without SCALE decoding.
+
+Only the (pallet index, call index) pair is needed to decide whether a pending
+extrinsic is interesting, and in a signed v4 extrinsic those two bytes sit right
+after a header whose shape is fixed by the runtime's signed extensions.  This
+module walks that header on raw bytes; it has no dependency on the node or on
+scalecodec so it can also run inside worker processes.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+# Signed extensions that contribute nothing to the extrinsic body (their data
+# lives only in the signed payload's "additional" part).
+_EMPTY_EXTENSIONS = frozenset(
+    {
+        "CheckNonZeroSender",
+        "CheckSpecVersion",
+        "CheckTxVersion",
+        "CheckGenesis",
+        "CheckWeight",
+        "SubtensorSignedExtension",
+        "SubtensorTransactionExtension",
+        "CommitmentsSignedExtension",
+    }
+)
+
+# Signed extensions with a fixed-shape body.
+_SIZED_EXTENSIONS = {
+    "CheckMortality": "era",
+    "CheckEra": "era",
+    "CheckNonce": "compact",
+    "ChargeTransactionPayment": "compact",
+    "CheckMetadataHash": "u8",
+}
+
+# MultiAddress variant -> encoded length (including the variant byte)
+_ADDRESS_LEN = {0x00: 33, 0x03: 33, 0x04: 21}
+# MultiSignature variant -> encoded length (including the variant byte)
+_SIGNATURE_LEN = {0x00: 65, 0x01: 65, 0x02: 66}
+
+
+def extra_layout(signed_extensions: Iterable[str]) -> tuple[str, ...] | None:
+    """Return the body layout of *signed_extensions*, or ``None`` if any of them
+    is unknown (the caller must then fall back to full decoding)."""
+    layout = []
+    for name in signed_extensions:
+        if name in _EMPTY_EXTENSIONS:
+            continue
+        kind = _SIZED_EXTENSIONS.get(name)
+        if kind is None:
+            return None
+        layout.append(kind)
+    return tuple(layout)
+
+
+def _skip_compact(raw: bytes, pos: int) -> int:
+    mode = raw[pos] & 0b11
+    if mode == 0:
+        return pos + 1
+    if mode == 1:
+        return pos + 2
+    if mode == 2:
+        return pos + 4
+    return pos + 1 + (raw[pos] >> 2) + 4
+
+
+def peek_call_index(raw: bytes, layout: tuple[str, ...] | None) -> bytes | None:
+    """Return the two call-index bytes of the v4 extrinsic *raw*.
+
+    ``None`` means "could not tell" (unknown version, address or signature
+    variant, or truncated input) and must be treated as a possible match.
+    """
+    try:
+        pos = _skip_compact(raw, 0)
+        version = raw[pos]
+        pos += 1
+        if version & 0x7F != 4:
+            return None
+        if version & 0x80:
+            if layout is None:
+                return None
+            address_len = _ADDRESS_LEN.get(raw[pos])
+            if address_len is None:
+                return None
+            pos += address_len
+            signature_len = _SIGNATURE_LEN.get(raw[pos])
+            if signature_len is None:
+                return None
+            pos += signature_len
+            for kind in layout:
+                if kind == "era":
+                    pos += 1 if raw[pos] == 0 else 2
+                elif kind == "compact":
+                    pos = _skip_compact(raw, pos)
+                else:
+                    pos += 1
+        if pos + 2 > len(raw):
+            return None
+        return raw[pos : pos + 2]
+    except IndexError:
+        return None
+
+
+def hex_to_bytes(hex_string: str) -> bytes:
+    return bytes.fromhex(hex_string[2:] if hex_string.startswith("0x") else hex_string)
@@ -1,17 +1,14 @@
-import bittensor
-from dotenv import load_dotenv
-import os
+import asyncio
 
-load_dotenv()
-WS_URL = os.getenv("WS_URL")
-subnet_count = 128
+import owners
+import rpc
 
 
-subtensor = bittensor.subtensor(network=WS_URL)
+async def main():
+    await rpc.client.start()
+    subnet_coldkeys = await owners.fetch_owners()
+    owners.save_snapshot(None, subnet_coldkeys)
+    print(subnet_coldkeys)
 
-subnet_coldkeys = {}
 
-for netuid in range(1,subnet_count+1):
-    subnet_coldkeys[netuid] = subtensor.subnet(netuid).owner_coldkey
-    
-print(subnet_coldkeys)
\ No newline at end of file
+asyncio.run(main())
@@ -1,22 +1,53 @@
-from scalecodec.types import Extrinsic
-from scalecodec.base import ScaleBytes
-from subtensor import metadata
-from subtensor import substrate
-
-def decode_extrinsic(hex_string):
-    xt = Extrinsic(data=ScaleBytes(hex_string), metadata=metadata)
-    xt.decode()
-    return xt
-
-def get_pool_reserves(netuid):
-    alpha_reserve = substrate.query(
-        module='SubtensorModule',
-        storage_function='SubnetAlphaIn',
-        params=[netuid]
-    ).value
-    tao_reserve = substrate.query(
-        module='SubtensorModule',
-        storage_function='SubnetTAO',
-        params=[netuid]
-    ).value
-    return alpha_reserve, tao_reserve
\ No newline at end of file
+from extrinsic_filter import hex_to_bytes, peek_call_index
+import metrics
+import runtime
+import storage
+
+
+def call_index(module, function):
+    """Return the 2-byte (pallet index, call index) of *module.function*."""
+    return runtime.current().call_index(module, function)
+
+
+def decode_extrinsic(hex_string, rt=None):
+    """Decode *hex_string* against *rt* (default: the live runtime); returns
+    the value dict."""
+    with metrics.timed("decode"):
+        return (rt or runtime.current()).decode(hex_string)
+
+
+def is_candidate(hex_string, targets=None, raw=None, rt=None):
+    """Cheap pre-check: can *hex_string* be a call in *targets*?
+
+    *targets* defaults to ``schedule_swap_coldkey`` in *rt* (default: the
+    live runtime)."""
+    rt = rt or runtime.current()
+    if raw is None:
+        raw = hex_to_bytes(hex_string)
+    if targets is None:
+        targets = {rt.call_index("SubtensorModule", "schedule_swap_coldkey")}
+    index = peek_call_index(raw, rt.extra_layout)
+    return index is None or index in targets
+
+
+def decode_if_candidate(hex_string, targets=None, raw=None, rt=None):
+    """Fully decode *hex_string* only when the byte prefilter lets it through."""
+    if not is_candidate(hex_string, targets, raw, rt):
+        return None
+    return decode_extrinsic(hex_string, rt)
+
+
+def storage_key(module, function, key):
+    """Full storage key of map entry *key* (raw SCALE bytes) in *module.function*."""
+    entry = runtime.current().metadata.get_metadata_pallet(module).get_storage_function(function)
+    return storage.map_key(module, function, key, entry.get_param_hashers()[0])
+
+
+async def fetch_pool_reserves(netuid):
+    """Alpha and TAO reserves of subnet *netuid*, both in one round trip."""
+    keys = [
+        storage_key('SubtensorModule', 'SubnetAlphaIn', storage.netuid_key(netuid)),
+        storage_key('SubtensorModule', 'SubnetTAO', storage.netuid_key(netuid)),
+    ]
+    values = await storage.read_values(keys)
+    return storage.decode_int(values[keys[0]]), storage.decode_int(values[keys[1]])
@@ -0,0 +1,194 @@
+"""Resolve every in-flight extrinsic from one read of each new block.
+
+Instead of one ``author_submitAndWatchExtrinsic`` subscription per order,
+`tracker.track` registers an extrinsic hash and returns a future.  For each
+head `watch_new_blocks` reports, the tracker fetches the block once (only
+while something is pending), hashes its extrinsics and settles every match
+from the block's ``System.Events`` (``ExtrinsicSuccess``/``ExtrinsicFailed``,
+read only when there is a match).  Orders still pending when their era has
+passed fail with `asyncio.TimeoutError`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+import config
+import events
+import metrics
+import rpc
+import runtime
+import storage
+from dedupe import extrinsic_hash
+from extrinsic_filter import hex_to_bytes
+
+# Most blocks caught up in one go after a gap in the head stream
+MAX_CATCHUP = 32
+
+
+@dataclass(frozen=True, slots=True)
+class Inclusion:
+    xt_hash: str
+    block_num: int
+    block_hash: str
+    index: int               # position in the block
+    success: bool | None     # None when the block's events could not be read
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class _Pending:
+    future: asyncio.Future
+    valid_until: int         # last block it can be included in
+    tracked_at: float        # perf_counter, for the inclusion histogram
+
+
+def dispatch_error_message(rt: runtime.Runtime, error) -> str:
+    """Readable name for a decoded ``DispatchError``."""
+    if isinstance(error, dict) and "Module" in error:
+        module = error["Module"]
+        if isinstance(module, (list, tuple)):
+            module = module[0]
+        index = module["error"]
+        if isinstance(index, str):
+            index = bytes.fromhex(index[2:])[0]  # [u8; 4], first byte is the index
+        elif isinstance(index, (list, tuple)):
+            index = index[0]
+        try:
+            err = rt.metadata.get_module_error(module["index"], index)
+            return f"{err.name}: {' '.join(err.docs)}".rstrip(": ")
+        except Exception:
+            return f"Module error {module['index']}/{index}"
+    if isinstance(error, dict):
+        return next(iter(error), "Unknown")
+    return str(error)
+
+
+def outcomes(rt: runtime.Runtime, events: list[dict]) -> dict[int, tuple[bool, str | None]]:
+    """``{extrinsic index: (success, error)}`` from decoded ``System.Events``."""
+    result = {}
+    for event in events:
+        if event.get("module_id") != "System" or event.get("extrinsic_idx") is None:
+            continue
+        if event["event_id"] == "ExtrinsicSuccess":
+            result[event["extrinsic_idx"]] = (True, None)
+        elif event["event_id"] == "ExtrinsicFailed":
+            error = (event.get("attributes") or {}).get("dispatch_error")
+            result[event["extrinsic_idx"]] = (False, dispatch_error_message(rt, error))
+    return result
+
+
+async def read_outcomes(block_hash: str,
+                        rt: runtime.Runtime | None = None) -> dict[int, tuple[bool, str | None]]:
+    """`outcomes` of block *block_hash*, its ``System.Events`` decoded with *rt*
+    (default: the live runtime); empty when they cannot be read."""
+    key = storage.storage_prefix("System", "Events")
+    values = await storage.read_values([key], block_hash)
+    if not values[key]:
+        return {}
+    rt = rt or runtime.current()
+    try:
+        events = rt.decode_storage("System", "Events", values[key])
+    except Exception as e:
+        config.logger.error("[Events Decode Error] %s", e, exc_info=True)
+        return {}
+    return outcomes(rt, events)
+
+
+class InclusionTracker:
+    def __init__(self) -> None:
+        self._pending: dict[str, _Pending] = {}
+        self._last: int | None = None         # last block processed
+        self._head: int | None = None         # newest block reported
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(self, xt_hash: str, valid_until: int) -> asyncio.Future:
+        """Future resolving to the `Inclusion` of *xt_hash*; register before
+        submitting so the including block cannot be missed."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending[xt_hash] = _Pending(future, valid_until, time.perf_counter())
+        return future
+
+    def forget(self, xt_hash: str) -> None:
+        pending = self._pending.pop(xt_hash, None)
+        if pending is not None and not pending.future.done():
+            pending.future.cancel()
+
+    def on_block(self, block_num: int) -> None:
+        """Process every block up to *block_num* in the background, in order."""
+        self._head = block_num
+        if not self._pending:
+            self._last = block_num  # nothing to look for in it
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending and self._head is not None and self._head != self._last:
+            head = self._head
+            first = head if self._last is None else max(self._last + 1, head - MAX_CATCHUP + 1)
+            for block_num in range(first, head + 1):
+                try:
+                    await self.process_block(block_num)
+                except ConnectionError as e:
+                    # Read node lost or failed over; retry from this block on
+                    # the next head rather than skip it
+                    config.logger.warning("[Inclusion Tracker] block %s: %s", block_num, e)
+                    return
+                except Exception as e:
+                    config.logger.error("[Inclusion Tracker Error] %s", e, exc_info=True)
+                self._last = block_num
+
+    async def read_block(self, block_num: int, wanted) -> list[Inclusion]:
+        """The `Inclusion` of every extrinsic hash in *wanted* that block
+        *block_num* contains."""
+        block_hash = await rpc.client.request("chain_getBlockHash", [block_num])
+        block = await rpc.client.request("chain_getBlock", [block_hash])
+        matches = {}
+        for index, hx in enumerate(block["block"]["extrinsics"]):
+            xt_hash = f"0x{extrinsic_hash(hex_to_bytes(hx)).hex()}"
+            if xt_hash in wanted:
+                matches[xt_hash] = index
+        if not matches:
+            return []
+        results = await read_outcomes(block_hash)
+        return [
+            Inclusion(xt_hash, block_num, block_hash, index, *results.get(index, (None, None)))
+            for xt_hash, index in matches.items()
+        ]
+
+    async def process_block(self, block_num: int) -> None:
+        for result in await self.read_block(block_num, self._pending):
+            pending = self._pending.pop(result.xt_hash, None)
+            if pending is None:
+                continue  # forgotten while the block was being read
+            metrics.since("inclusion", pending.tracked_at)
+            events.publish(
+                events.INCLUSION, xt_hash=result.xt_hash, block=block_num,
+                block_hash=result.block_hash, index=result.index,
+                success=result.success, error=result.error,
+            )
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+        for xt_hash, pending in list(self._pending.items()):
+            if pending.valid_until < block_num:
+                del self._pending[xt_hash]
+                events.publish(
+                    events.INCLUSION, xt_hash=xt_hash, block=block_num,
+                    success=False, error="expired",
+                )
+                if not pending.future.done():
+                    pending.future.set_exception(
+                        asyncio.TimeoutError(f"not included by block {pending.valid_until}")
+                    )
+
+
+
+tracker = InclusionTracker()
+metrics.register_gauge("tracked_extrinsics", lambda: len(tracker))
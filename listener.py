@@ -3,107 +3,131 @@
 from __future__ import annotations
 
 import asyncio
-import json
-
-import websockets
-from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+import time
 
 import config
-from helpers import decode_extrinsic
-from staking import add_stake
+import events
+import inclusion
+import metrics
+import orders
+from dedupe import SeenCache, extrinsic_hash
+from extrinsic_filter import hex_to_bytes
+import owners
+import rpc
+import rules
+import runtime
+import startup
+from decoder_pool import DecoderPool
+from helpers import decode_if_candidate
+from reserves import reserve_table
+from staking import add_stake, signers
 from telegram import printTG
 
-MAX_RECONNECT_DELAY = 60  # seconds
+DECODE_BATCH = 256  # entries handled before yielding back to the loop
+
+# Pending extrinsics already handled, by hash; survives block boundaries so a
+# transaction lingering in the pool is never decoded or acted on twice
+_seen = SeenCache(config.SEEN_TTL_BLOCKS, config.SEEN_MAX_ENTRIES)
+# The subset of `_seen` that triggered stakes; never re-processed, even when
+# the pool is rescanned after a runtime upgrade
+_acted = SeenCache(config.SEEN_TTL_BLOCKS, config.SEEN_MAX_ENTRIES)
+
+# Hand-off between the pool feed (producer) and the decoder (consumer) so that
+# a burst of pool entries never stalls the socket reader.
+# Items are (hex, perf_counter at arrival).
+_pending_queue: asyncio.Queue[tuple[str, float]] = asyncio.Queue(
+    maxsize=config.PENDING_QUEUE_SIZE
+)
+
+
+# Worker processes for large batches; started with the listeners and again
+# with the new metadata after a runtime upgrade, and only used once warm
+_decoder: DecoderPool | None = None
+_rescan_task: asyncio.Task | None = None
+
+# Strong references to fire-and-forget stake tasks until they finish
+_stake_tasks: set[asyncio.Task] = set()
+# Stakes on different subnets run concurrently, on the same subnet in turn
+_netuid_locks: dict[int, asyncio.Lock] = {}
+
+
+metrics.register_gauge("pending_queue_depth", _pending_queue.qsize)
+metrics.register_gauge("seen_cache_size", lambda: len(_seen))
+
 
-# Guards access to `config.seen_this_block`
-_seen_lock = asyncio.Lock()
+class _SubscriptionUnsupported(Exception):
+    """The node rejected the pending-pool subscription method."""
 
 
-async def safe_connect():
-    """Connect with back‑off *and* rate‑limit to avoid hammering the node."""
-    delay = 1
+async def _stream_pool() -> None:
+    """Forward every pool entry the node pushes to us."""
+    try:
+        sub = await rpc.client.subscribe(config.PENDING_SUBSCRIBE_METHOD)
+    except rpc.RpcError as e:
+        raise _SubscriptionUnsupported(e) from e
+    async for result in sub:
+        arrived = time.perf_counter()
+        startup.mark("first_poll")
+        if isinstance(result, str):
+            await _pending_queue.put((result, arrived))
+        elif isinstance(result, list):
+            for hx in result:
+                await _pending_queue.put((hx, arrived))
+
+
+async def _poll_pool(interval: float) -> None:
+    """Poll ``author_pendingExtrinsics`` and forward only entries not seen in the
+    previous snapshot, so a large, slow-moving pool costs a set diff per poll."""
+    previous: set[str] = set()
     while True:
         try:
-            config.record_reconnect_attempt()
-            if len(config.reconnect_attempts) > 20:
-                await asyncio.sleep(60)
-
-            return await websockets.connect(
-                config.WS_URL, ping_interval=20, ping_timeout=10
-            )
+            pendings = await rpc.client.request("author_pendingExtrinsics")
+        except ConnectionError:
+            raise
         except Exception as e:
-            msg = f"[Reconnect Failed] Retrying in {delay}s: {e}"
+            msg = f"[WS/JSON Error - poll_pending_extrinsics] {e}"
             config.logger.error(msg, exc_info=True)
             printTG(msg)
-            await asyncio.sleep(delay)
-            delay = min(MAX_RECONNECT_DELAY, delay * 2)
+            await asyncio.sleep(interval)
+            continue
+
+        arrived = time.perf_counter()
+        startup.mark("first_poll")
+        metrics.set_gauge("pool_size", len(pendings))
+        current = set(pendings)
+        for hx in pendings:
+            if hx not in previous:
+                await _pending_queue.put((hx, arrived))
+        previous = current
+
+        await asyncio.sleep(interval)
 
 
 async def poll_pending_extrinsics():
-    req_id = 1000
+    """Feed pending extrinsics into the decode queue.
+
+    In ``stream`` mode entries are taken from ``PENDING_SUBSCRIBE_METHOD`` as the
+    node learns about them; without that subscription we fall back to a fast
+    diffing poll every ``STREAM_POLL_INTERVAL``.  ``poll`` mode keeps the plain
+    ``POLL_INTERVAL`` loop.  Reconnects are handled by `rpc.client`.
+    """
+    stream = config.PENDING_FEED == "stream"
+    subscribe = stream and bool(config.PENDING_SUBSCRIBE_METHOD)
+    interval = config.STREAM_POLL_INTERVAL if stream else config.POLL_INTERVAL
     while True:
-        ws = await safe_connect()
         try:
-            async with ws:
-                while True:
-                    try:
-                        await ws.send(
-                            json.dumps(
-                                {
-                                    "jsonrpc": "2.0",
-                                    "id": req_id,
-                                    "method": "author_pendingExtrinsics",
-                                    "params": [],
-                                }
-                            )
-                        )
-                        resp = json.loads(await ws.recv())
-                        pendings = resp.get("result", [])
-                    except (
-                        ConnectionClosedError,
-                        ConnectionClosedOK,
-                        asyncio.TimeoutError,
-                    ) as e:
-                        msg = f"[WebSocket Closed - poll_pending_extrinsics] {e}"
-                        config.logger.warning(msg)
-                        printTG(msg)
-                        break
-                    except Exception as e:
-                        msg = f"[WS/JSON Error - poll_pending_extrinsics] {e}"
-                        config.logger.error(msg, exc_info=True)
-                        printTG(msg)
-                        pendings = []
-
-                    for hx in pendings:
-                        async with _seen_lock:
-                            if hx in config.seen_this_block:
-                                continue
-                            config.seen_this_block.add(hx)
-                        try:
-                            xt = decode_extrinsic(hx)
-                            if (
-                                xt.value["call"]["call_function"]
-                                == "schedule_swap_coldkey"
-                            ):
-                                caller = xt.value["address"]
-                                new_coldkey = next(
-                                    (
-                                        arg["value"]
-                                        for arg in xt.value["call"]["call_args"]
-                                        if arg["name"] == "new_coldkey"
-                                    ),
-                                    None,
-                                )
-                                netuid = config.subnet_coldkeys.get(caller, -1)
-                                if netuid != -1:
-                                    add_stake(netuid)
-                                else:
-                                    printTG("Invalid netuid for caller %s" % caller)
-                        except Exception as e:
-                            msg = f"[Decode Hex Error] {e}"
-                            printTG(msg)
-                            config.logger.error(msg, exc_info=True)
-                            continue
+            if subscribe:
+                try:
+                    await _stream_pool()
+                except _SubscriptionUnsupported as e:
+                    # Remember the refusal so we go straight to polling from now on
+                    subscribe = False
+                    msg = f"[Pending subscription unsupported, polling instead] {e}"
+                    config.logger.warning(msg)
+                    printTG(msg)
+            await _poll_pool(interval)
+        except ConnectionError:
+            await rpc.client.wait_connected()
         except Exception as e:
             msg = f"[Unexpected Error in poll_pending_extrinsics] {e}"
             config.logger.error(msg, exc_info=True)
@@ -111,48 +135,269 @@ async def poll_pending_extrinsics():
             await asyncio.sleep(3)
 
 
+def _on_stake_done(task: asyncio.Task) -> None:
+    _stake_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        e = task.exception()
+        msg = f"[Staking Error] {e}"
+        config.logger.error(msg, exc_info=e)
+        printTG(msg)
+
+
+async def _place_order(order_id: int, netuid: int, detected_at: float) -> None:
+    lock = _netuid_locks.setdefault(netuid, asyncio.Lock())
+    async with lock:
+        try:
+            await add_stake(netuid, detected_at=detected_at, order_id=order_id)
+        except Exception as e:
+            orders.ledger.update(order_id, status=orders.FAILED, error=str(e))
+            raise
+
+
+def _spawn_stake(trigger: bytes, netuid: int, detected_at: float) -> None:
+    """Open a ledger order for (*trigger*, *netuid*) and start `add_stake`
+    without holding up the pool consumer; a repeat of either is ignored."""
+    order_id = orders.ledger.claim(
+        f"0x{trigger.hex()}", netuid, config.current_block, config.STAKE_AMOUNT
+    )
+    if order_id is None:
+        config.logger.warning(
+            "[Duplicate Order] 0x%s on subnet %s already placed", trigger.hex(), netuid
+        )
+        return
+    task = asyncio.create_task(_place_order(order_id, netuid, detected_at))
+    _stake_tasks.add(task)
+    task.add_done_callback(_on_stake_done)
+
+
+def _start_decoder() -> None:
+    """Start a worker pool for the live runtime; its workers load the
+    metadata in the background while batches are decoded inline."""
+    global _decoder
+    if _decoder is None and config.DECODE_WORKERS > 0:
+        rt = runtime.current()
+        _decoder = decoder = DecoderPool(
+            config.DECODE_WORKERS, rt.metadata_hex, config.SS58_FORMAT, rt.extra_layout,
+            rules.targets(),
+        )
+        decoder.start().add_done_callback(lambda task: _on_decoder_started(decoder, task))
+
+
+def _on_decoder_started(decoder: DecoderPool, task: asyncio.Task) -> None:
+    if task.cancelled() or task.exception() is None:
+        return
+    msg = f"[Decoder Pool Error] workers failed to start: {task.exception()}"
+    printTG(msg)
+    config.logger.error(msg, exc_info=task.exception())
+    if decoder is _decoder:
+        _drop_decoder()
+
+
+def _get_decoder() -> DecoderPool | None:
+    """The worker pool once every worker is ready, else ``None``."""
+    _start_decoder()  # again after a failure dropped the last one
+    if _decoder is None or not _decoder.ready:
+        return None
+    return _decoder
+
+
+def _decode_inline(hx: str, raw: bytes) -> dict | str | None:
+    try:
+        return decode_if_candidate(hx, rules.targets(), raw=raw)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _drop_decoder() -> None:
+    """Shut the worker pool down; the next batch starts a fresh one."""
+    global _decoder
+    if _decoder is not None:
+        _decoder.shutdown()
+        _decoder = None
+
+
+async def _decode(batch: list[tuple[str, bytes, bytes, float]]) -> list[dict | str | None]:
+    """Decode *batch* in order, through the worker pool when it is large enough
+    and the pool's workers are ready.
+
+    If the pool fails (a worker died, say) the batch is decoded inline instead
+    and the pool is rebuilt for the next one.
+    """
+    decoder = _get_decoder()
+    if decoder is not None and len(batch) >= config.DECODE_POOL_MIN_BATCH:
+        try:
+            with metrics.timed("decode_batch"):
+                return await decoder.decode([hx for hx, _, _, _ in batch])
+        except Exception as e:
+            msg = f"[Decoder Pool Error] {e}; decoding {len(batch)} entries inline"
+            printTG(msg)
+            config.logger.error(msg, exc_info=True)
+            if decoder is _decoder:
+                _drop_decoder()
+    return [_decode_inline(hx, raw) for hx, raw, _, _ in batch]
+
+
+@rules.register_action("stake")
+def _stake_action(rule: rules.Rule, fields: dict, ctx: dict) -> None:
+    """Stake on every subnet the signer owns, or on the subnet in the call
+    argument named by the rule's ``netuid_arg`` option."""
+    caller = fields["signer"]
+    netuid_arg = rule.options.get("netuid_arg")
+    if netuid_arg is not None:
+        netuids = [fields[netuid_arg]] if netuid_arg in fields else []
+    else:
+        netuids = config.subnet_coldkeys.get(caller, [])
+    for netuid in netuids:
+        _spawn_stake(ctx["hash"], netuid, ctx["arrived"])
+    if not netuids:
+        printTG("Invalid netuid for caller %s" % caller)
+
+
+def _handle_decoded(key: bytes, value: dict, arrived: float) -> None:
+    fired = rules.dispatch(value, {"arrived": arrived, "hash": key})
+    if fired:
+        _acted.add(key, config.current_block)
+        events.publish(
+            events.DETECTION,
+            xt_hash=f"0x{key.hex()}",
+            call=f"{value['call']['call_module']}.{value['call']['call_function']}",
+            signer=value.get("address"),
+            args={a["name"]: a["value"] for a in value["call"]["call_args"]},
+            rules=[rule.name for rule in fired],
+            block=config.current_block,
+        )
+
+
+async def _handle_batch(items: list[tuple[str, float]]) -> None:
+    batch = []
+    for hx, arrived in items:
+        metrics.since("pool_arrival", arrived)
+        try:
+            raw = hex_to_bytes(hx)
+        except ValueError as e:
+            config.logger.error("[Decode Hex Error] %s", e)
+            continue
+        key = extrinsic_hash(raw)
+        if _seen.add(key, config.current_block):
+            batch.append((hx, raw, key, arrived))
+    if not batch:
+        return
+
+    try:
+        values = await _decode(batch)
+    except Exception as e:
+        # Nothing in the batch was looked at; let the next sighting retry it
+        for _, _, key, _ in batch:
+            _seen.discard(key)
+        msg = f"[Decode Batch Error] {e}"
+        printTG(msg)
+        config.logger.error(msg, exc_info=True)
+        return
+
+    if any(isinstance(value, dict) for value in values):
+        # Owner rules need the index; only waits while startup is warming it
+        await owners.wait_ready()
+
+    # Results line up with the batch, so matches are acted on in arrival order
+    for (hx, _, key, arrived), value in zip(batch, values):
+        if value is None:
+            continue
+        try:
+            if isinstance(value, str):
+                # Possibly built for a runtime we have not swapped to yet;
+                # forget it so the post-upgrade rescan picks it up again
+                _seen.discard(key)
+                raise ValueError(value)
+            _handle_decoded(key, value, arrived)
+        except Exception as e:
+            msg = f"[Decode Hex Error] {e}"
+            printTG(msg)
+            config.logger.error(msg, exc_info=True)
+
+
+async def process_pending_extrinsics():
+    """Drain the pending queue in batches of up to `DECODE_BATCH`.
+
+    Large batches are decoded by the worker pool while the loop keeps serving
+    the block watcher and submissions; small ones are decoded inline and
+    followed by a yield so a steady trickle cannot starve the loop either.
+    Until the pool's workers have loaded the metadata, everything is decoded
+    inline.
+    """
+    _start_decoder()
+    while True:
+        items = [await _pending_queue.get()]
+        while len(items) < DECODE_BATCH:
+            try:
+                items.append(_pending_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        await _handle_batch(items)
+        await asyncio.sleep(0)
+
+
+async def _rescan_pool() -> None:
+    """Re-queue every pool entry that has not triggered a stake yet.
+
+    Entries seen between the upgrade and the swap were prefiltered and decoded
+    against the old metadata, so they are run through again under the new one.
+    """
+    pendings = await rpc.client.request("author_pendingExtrinsics")
+    arrived = time.perf_counter()
+    for hx in pendings:
+        key = extrinsic_hash(hex_to_bytes(hx))
+        if key in _acted:
+            continue
+        _seen.discard(key)
+        await _pending_queue.put((hx, arrived))
+
+
+def _on_rescan_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        e = task.exception()
+        msg = f"[Pool Rescan Error] {e}"
+        config.logger.error(msg, exc_info=e)
+        printTG(msg)
+
+
+def _on_runtime_swap(rt: runtime.Runtime) -> None:
+    global _rescan_task
+    _drop_decoder()
+    _start_decoder()
+    _rescan_task = asyncio.create_task(_rescan_pool())
+    _rescan_task.add_done_callback(_on_rescan_done)
+
+
+runtime.on_swap(_on_runtime_swap)
+
+
 async def watch_new_blocks():
     current_block = None
     while True:
-        ws = await safe_connect()
         try:
-            async with ws:
-                await ws.send(
-                    json.dumps(
-                        {
-                            "jsonrpc": "2.0",
-                            "id": 1,
-                            "method": "chain_subscribeNewHeads",
-                            "params": [],
-                        }
-                    )
-                )
-                _ = json.loads(await ws.recv())["result"]
-                while True:
-                    try:
-                        data = json.loads(await ws.recv())
-                        header = data.get("params", {}).get("result")
-                        if not header:
-                            continue
-                        block_num = int(header["number"], 16)
-                        if block_num != current_block:
-                            current_block = block_num
-                            async with _seen_lock:
-                                config.seen_this_block.clear()
-                            print(f"🧱 New block: {block_num}")
-                    except (
-                        ConnectionClosedError,
-                        ConnectionClosedOK,
-                        asyncio.TimeoutError,
-                    ) as e:
-                        msg = f"[WebSocket Closed - watch_new_blocks] {e}"
-                        config.logger.warning(msg)
-                        printTG(msg)
-                        break
-                    except Exception as e:
-                        msg = f"[WS/JSON Error - watch_new_blocks] {e}"
-                        config.logger.error(msg, exc_info=True)
-                        printTG(msg)
+            heads = await rpc.client.subscribe(
+                "chain_subscribeNewHeads", unsubscribe="chain_unsubscribeNewHeads"
+            )
+            async for header in heads:
+                try:
+                    block_num = int(header["number"], 16)
+                    if block_num != current_block:
+                        current_block = block_num
+                        config.current_block = block_num
+                        startup.mark("first_head")
+                        reserve_table.schedule_refresh(block_num)
+                        signers.schedule_head(block_num)
+                        inclusion.tracker.on_block(block_num)
+                        owners.schedule_refresh(block_num)
+                        _seen.expire(block_num)
+                        _acted.expire(block_num)
+                        print(f"🧱 New block: {block_num}")
+                except Exception as e:
+                    msg = f"[WS/JSON Error - watch_new_blocks] {e}"
+                    config.logger.error(msg, exc_info=True)
+                    printTG(msg)
+        except ConnectionError:
+            await rpc.client.wait_connected()
         except Exception as e:
             msg = f"[Unexpected Error in watch_new_blocks] {e}"
             config.logger.error(msg, exc_info=True)
@@ -1,24 +1,146 @@
+"""Bot entry point.
+
+    python main.py                      run the bot
+    python main.py --profile-startup    start up, print where the time went
+                                        (by import and by phase), and exit
+
+Startup does only what detection needs before the listeners start: connect,
+load the runtime metadata, compile the rules.  The signing accounts and the
+subnet owner index warm up alongside the listeners, retrying with back-off
+until they succeed, and orders the previous run submitted are settled from
+the chain; acting on a detection waits for the owner index and staking waits
+for the signers, each only until they are ready.
+"""
+
 from __future__ import annotations
 
+import argparse
 import asyncio
+import sys
+
+import startup  # first, so its clock and import timer cover everything else
+
+# Longest wait between warm-up attempts, seconds
+MAX_WARM_UP_DELAY = 30
 
-import config
-from listener import poll_pending_extrinsics, watch_new_blocks
-from subtensor import subtensor
 
+async def main(profile: bool = False, target_ms: float | None = None) -> int:
+    with startup.phase("imports"):
+        import metrics
+        import orders
+        import owners
+        import rpc
+        import rules
+        import runtime
+        import telegram
+        from listener import (
+            poll_pending_extrinsics,
+            process_pending_extrinsics,
+            watch_new_blocks,
+        )
+        from staking import signers
+        from supervisor import supervisor
 
-async def main():
-    print("Getting subnet keys")
-    for netuid in range(1, config.subnet_count + 1):
-        config.subnet_coldkeys[
-            subtensor.subnet(netuid).owner_coldkey
-        ] = netuid
+    # Key derivation needs no node; let it run while we connect
+    signers.load_keys()
+    with startup.phase("ledger_recover"):
+        abandoned = orders.ledger.recover()
+    if abandoned:
+        print(f"Closed {abandoned} orders left unsubmitted by the previous run")
+    with startup.phase("connect"):
+        await rpc.client.start()
+    with startup.phase("runtime"):
+        rt = await runtime.load()
+    print(f"Runtime {rt.spec_name} v{rt.spec_version} loaded")
+    with startup.phase("rules"):
+        rules.load()
+
+    warm_up = asyncio.gather(
+        startup.timed("signers", _until_done("Signer Sync", signers.sync)),
+        startup.timed("owners", _until_done("Owner Warm Start", owners.warm_start)),
+        startup.timed("orders", _settle_submitted()),
+    )
     print("Starting listeners...")
-    await asyncio.gather(
+    startup.mark("listeners_started")
+    listeners = asyncio.gather(
         poll_pending_extrinsics(),
+        process_pending_extrinsics(),
         watch_new_blocks(),
+        runtime.watch_upgrades(),
+        supervisor.run(),
+        telegram.run_sender(),
+        metrics.serve(),
     )
+    if not profile:
+        first_poll = asyncio.create_task(_report_first_poll())
+        await asyncio.gather(warm_up, listeners)
+        first_poll.cancel()
+        return 0
+
+    await asyncio.gather(warm_up, startup.wait("first_poll"))
+    listeners.cancel()
+    print(startup.report())
+    first_poll_ms = startup.marks["first_poll"] * 1000
+    if target_ms is not None and first_poll_ms > target_ms:
+        print(f"Time to first poll {first_poll_ms:.0f} ms exceeds target {target_ms:.0f} ms")
+        return 1
+    return 0
+
+
+async def _until_done(name: str, start) -> None:
+    """Await *start()* until it succeeds.
+
+    Warm-up runs alongside the listeners, so an error here must not end
+    `main` (and with it every listener); trading waits on what it sets up.
+    """
+    import config
+    import rpc
+    from telegram import printTG
+
+    delay = 1
+    while True:
+        try:
+            return await start()
+        except ConnectionError:
+            # Lost or failed-over node: retry on whichever client is live
+            await rpc.client.wait_connected()
+        except Exception as e:
+            msg = f"[{name} Error] retrying in {delay}s: {e}"
+            config.logger.error(msg, exc_info=True)
+            printTG(msg)
+            await asyncio.sleep(delay)
+            delay = min(MAX_WARM_UP_DELAY, delay * 2)
+
+
+async def _settle_submitted() -> None:
+    import config
+    from staking import recover_submitted
+
+    try:
+        settled = await recover_submitted()
+    except Exception as e:
+        config.logger.error("[Order Recovery Error] %s", e, exc_info=True)
+        return
+    if settled:
+        print(f"Settled {settled} orders submitted by the previous run")
+
+
+async def _report_first_poll() -> None:
+    at = await startup.wait("first_poll")
+    print(f"First pool read {at * 1000:.0f} ms after start")
+
+
+def cli() -> int:
+    parser = argparse.ArgumentParser(description="Subnet owner coldkey-swap watcher")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report startup time by import and phase, then exit")
+    parser.add_argument("--target-ms", type=float,
+                        help="with --profile-startup, exit 1 when time to first poll exceeds this")
+    args = parser.parse_args()
+    if args.profile_startup:
+        startup.enable_import_timing()
+    return asyncio.run(main(args.profile_startup, args.target_ms))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(cli())
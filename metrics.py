@@ -0,0 +1,172 @@
+"""Latency histograms and gauges, exposed on a local HTTP metrics endpoint.
+
+Each stage of the swap-to-inclusion path records its duration into a
+fixed-bucket histogram (one `bisect` and three additions per observation).
+`serve()` exposes everything in Prometheus text format on
+``http://METRICS_HOST:METRICS_PORT/metrics``.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Callable
+
+import config
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1_000, 2_500, 5_000, 10_000, 30_000,
+)
+
+# Stages of one detection, in pipeline order
+STAGES = (
+    "pool_arrival",    # feed receipt -> picked up by the decoder
+    "decode",          # full SCALE decode of a candidate
+    "decode_batch",    # one batch through the decoder worker pool
+    "reserve_lookup",  # cached or fetched reserves for the target subnet
+    "sizing",          # sizing table rebuild for every subnet
+    "compose",
+    "sign",
+    "book_build",      # pre-signing the stake book for a new head
+    "submit",          # submission -> acknowledged by the primary node
+    "inclusion",       # acknowledged -> in a block
+    "detect_to_submit",  # feed receipt -> acknowledged (end to end)
+)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.sum += ms
+        self.count += 1
+
+
+histograms: dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+gauges: dict[str, float] = {}
+_gauge_fns: dict[str, Callable[[], float]] = {
+    "reconnect_attempts_last_minute": config.recent_reconnect_attempts,
+}
+_route_fns: list[Callable] = []
+
+
+def observe(stage: str, seconds: float) -> None:
+    hist = histograms.get(stage)
+    if hist is None:
+        hist = histograms[stage] = Histogram()
+    hist.observe(seconds * 1000)
+
+
+def since(stage: str, start: float) -> float:
+    """Observe the time since *start* (a `time.perf_counter()` value) and
+    return the current `perf_counter()` so stages can be chained."""
+    now = time.perf_counter()
+    observe(stage, now - start)
+    return now
+
+
+class timed:
+    """``with timed("decode"): ...`` records the block's duration."""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        observe(self.stage, time.perf_counter() - self.start)
+
+
+def set_gauge(name: str, value: float) -> None:
+    gauges[name] = value
+
+
+def register_gauge(name: str, fn: Callable[[], float]) -> None:
+    """Compute gauge *name* from *fn* at scrape time."""
+    _gauge_fns[name] = fn
+
+
+def register_routes(fn: Callable) -> None:
+    """Have *fn(app)* add routes to the metrics server when it is built."""
+    _route_fns.append(fn)
+
+
+def render() -> str:
+    lines = []
+    for stage, hist in histograms.items():
+        name = f"coldkey_bot_{stage}_ms"
+        lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS_MS, hist.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {hist.count}')
+        lines.append(f"{name}_sum {hist.sum}")
+        lines.append(f"{name}_count {hist.count}")
+    values = dict(gauges)
+    for gauge, fn in _gauge_fns.items():
+        try:
+            values[gauge] = fn()
+        except Exception:
+            continue
+    for gauge, value in values.items():
+        name = f"coldkey_bot_{gauge}"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def build_app():
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics_endpoint() -> str:
+        return render()
+
+    for add_routes in _route_fns:
+        add_routes(app)
+    return app
+
+
+async def serve() -> None:
+    """Run the metrics endpoint in this event loop (disabled when port is 0).
+
+    The endpoint is optional: when it cannot be served (the port is taken),
+    the error is logged and the bot keeps running without it.
+    """
+    if not config.METRICS_PORT:
+        return
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            build_app(),
+            host=config.METRICS_HOST,
+            port=config.METRICS_PORT,
+            log_level="warning",
+            lifespan="off",
+        )
+    )
+    try:
+        await server.serve()
+    except (OSError, SystemExit) as e:
+        # uvicorn calls sys.exit(1) when it cannot bind
+        config.logger.error(
+            "[Metrics Server Error] not serving on %s:%s: %r",
+            config.METRICS_HOST, config.METRICS_PORT, e,
+        )
@@ -0,0 +1,149 @@
+"""Durable, idempotent order ledger (SQLite in WAL mode).
+
+Every stake the bot decides to place is first claimed here under
+``(trigger_hash, netuid)``; the unique constraint makes the claim the dedupe,
+so a trigger seen twice (or again after a restart) never fires a second
+order.  The row then follows the order through pricing, submission and
+inclusion, and open rows give the in-flight exposure.
+
+Writes are single-row statements on a local WAL database with
+``synchronous=NORMAL``, cheap enough to run on the event loop.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+
+import config
+import events
+import metrics
+
+PENDING = "pending"        # claimed, not yet submitted
+SUBMITTED = "submitted"    # acknowledged by a node, awaiting inclusion
+INCLUDED = "included"
+FAILED = "failed"
+SKIPPED = "skipped"        # decided against (e.g. inactive subnet)
+ABANDONED = "abandoned"    # claimed by a run that exited before submitting
+
+OPEN = (PENDING, SUBMITTED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id           INTEGER PRIMARY KEY,
+    trigger_hash TEXT    NOT NULL,
+    netuid       INTEGER NOT NULL,
+    status       TEXT    NOT NULL,
+    created_at   REAL    NOT NULL,
+    updated_at   REAL    NOT NULL,
+    block        INTEGER,
+    amount       INTEGER,
+    price        TEXT,
+    limit_price  INTEGER,
+    xt_hash      TEXT,
+    valid_until  INTEGER,
+    block_hash   TEXT,
+    error        TEXT,
+    UNIQUE (trigger_hash, netuid)
+);
+CREATE INDEX IF NOT EXISTS orders_status ON orders (status);
+CREATE INDEX IF NOT EXISTS orders_xt_hash ON orders (xt_hash);
+"""
+
+_COLUMNS = frozenset(
+    {
+        "status", "block", "amount", "price", "limit_price", "xt_hash", "valid_until",
+        "block_hash", "error",
+    }
+)
+
+
+class OrderLedger:
+    def __init__(self, path: str = config.ORDERS_DB_PATH) -> None:
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, isolation_level=None)  # autocommit
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(orders)")}
+            if "valid_until" not in columns:  # ledgers created before it existed
+                db.execute("ALTER TABLE orders ADD COLUMN valid_until INTEGER")
+            self._db = db
+        return self._db
+
+    def claim(self, trigger_hash: str, netuid: int, block: int | None = None,
+              amount: int | None = None) -> int | None:
+        """Open an order for (*trigger_hash*, *netuid*); ``None`` when one
+        already exists."""
+        now = time.time()
+        cur = self.db.execute(
+            "INSERT OR IGNORE INTO orders"
+            " (trigger_hash, netuid, status, created_at, updated_at, block, amount)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (trigger_hash, netuid, PENDING, now, now, block, amount),
+        )
+        if not cur.rowcount:
+            return None
+        events.publish(
+            events.ORDER, order_id=cur.lastrowid, trigger_hash=trigger_hash,
+            netuid=netuid, status=PENDING, block=block, amount=amount,
+        )
+        return cur.lastrowid
+
+    def update(self, order_id: int, **fields) -> None:
+        unknown = set(fields) - _COLUMNS
+        if unknown:
+            raise ValueError(f"unknown order fields: {sorted(unknown)}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self.db.execute(
+            f"UPDATE orders SET {assignments}, updated_at = ? WHERE id = ?",
+            (*fields.values(), time.time(), order_id),
+        )
+        if "status" in fields:
+            events.publish(events.ORDER, order_id=order_id, **fields)
+
+    def get(self, order_id: int) -> sqlite3.Row | None:
+        return self.db.execute("SELECT * FROM orders WHERE id = ?", (order_id,)).fetchone()
+
+    def open_orders(self) -> list[sqlite3.Row]:
+        return self.db.execute(
+            "SELECT * FROM orders WHERE status IN (?, ?) ORDER BY id", OPEN
+        ).fetchall()
+
+    def submitted(self) -> list[sqlite3.Row]:
+        return self.db.execute(
+            "SELECT * FROM orders WHERE status = ? ORDER BY id", (SUBMITTED,)
+        ).fetchall()
+
+    def exposure(self) -> int:
+        """Planck committed to orders not yet resolved."""
+        (total,) = self.db.execute(
+            "SELECT COALESCE(SUM(amount), 0) FROM orders WHERE status IN (?, ?)", OPEN
+        ).fetchone()
+        return total
+
+    def recover(self) -> int:
+        """Close orders a previous run claimed but never submitted; returns
+        how many.  Submitted ones are settled from the chain by
+        `staking.recover_submitted`."""
+        cur = self.db.execute(
+            "UPDATE orders SET status = ?, updated_at = ? WHERE status = ?",
+            (ABANDONED, time.time(), PENDING),
+        )
+        return cur.rowcount
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+ledger = OrderLedger()
+metrics.register_gauge("open_orders", lambda: len(ledger.open_orders()))
+metrics.register_gauge("open_exposure_planck", ledger.exposure)
@@ -0,0 +1,115 @@
+"""Subnet owner index: owner coldkey -> netuids.
+
+The index is built from a single bulk read of the `SubnetOwner` storage map,
+saved to a local JSON snapshot for instant warm restarts, and re-read every
+`OWNER_REFRESH_BLOCKS` blocks so ownership changes and newly registered
+subnets are picked up without a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from scalecodec.utils.ss58 import ss58_encode
+
+import config
+import rpc
+import storage
+from atomic import atomic_write
+from coalescer import Coalescer
+from telegram import printTG
+
+# Set once an owner index (snapshot or chain) is installed
+_ready = asyncio.Event()
+
+
+async def fetch_owners(block_hash: str | None = None) -> dict[int, str]:
+    """Return ``{netuid: owner_coldkey}`` for every registered subnet."""
+    entries = await storage.read_map("SubtensorModule", "SubnetOwner", block_hash)
+    return {
+        storage.netuid_of(key): ss58_encode(bytes.fromhex(value[2:]), config.SS58_FORMAT)
+        for key, value in entries.items()
+        if value
+    }
+
+
+def build_index(owners: dict[int, str]) -> dict[str, list[int]]:
+    """Invert *owners*; a coldkey owning several subnets maps to all of them."""
+    index: dict[str, list[int]] = {}
+    for netuid in sorted(owners):
+        index.setdefault(owners[netuid], []).append(netuid)
+    return index
+
+
+def load_snapshot(path: str = config.OWNER_SNAPSHOT_PATH) -> tuple[int, dict[int, str]] | None:
+    try:
+        with open(path) as fh:
+            data = json.load(fh)
+        return data["block"], {int(k): v for k, v in data["owners"].items()}
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError) as e:
+        config.logger.warning("[Owner Snapshot Corrupt] %s: %s", path, e)
+        return None
+
+
+def save_snapshot(block: int | None, owners: dict[int, str], path: str = config.OWNER_SNAPSHOT_PATH) -> None:
+    with atomic_write(path) as fh:
+        json.dump({"block": block, "owners": owners}, fh)
+
+
+def apply(owners: dict[int, str]) -> None:
+    """Install *owners* as the live index, reporting any changes."""
+    previous = config.subnet_owners
+    if previous:
+        for netuid, owner in owners.items():
+            old = previous.get(netuid)
+            if old is None:
+                printTG(f"New subnet {netuid} owned by {owner}")
+            elif old != owner:
+                printTG(f"Subnet {netuid} owner changed: {old} -> {owner}")
+    config.subnet_owners = owners
+    config.subnet_coldkeys = build_index(owners)
+    _ready.set()
+
+
+async def refresh(block_num: int | None = None) -> None:
+    block_hash = (
+        await rpc.client.request("chain_getBlockHash", [block_num])
+        if block_num is not None
+        else None
+    )
+    owners = await fetch_owners(block_hash)
+    if owners != config.subnet_owners:
+        apply(owners)
+        save_snapshot(block_num, owners)
+    _ready.set()
+
+
+async def warm_start() -> None:
+    """Load the snapshot if there is one, else block on a bulk read."""
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        block, owners = snapshot
+        apply(owners)
+        print(f"Loaded {len(owners)} subnet owners from snapshot (block {block})")
+        schedule_refresh(None)
+    else:
+        await refresh()
+        print(f"Loaded {len(config.subnet_owners)} subnet owners from chain")
+
+
+async def wait_ready() -> None:
+    """Wait for `warm_start` to install an index."""
+    await _ready.wait()
+
+
+_refreshes = Coalescer("Owner Refresh", refresh)
+
+
+def schedule_refresh(block_num: int | None) -> None:
+    """Re-read the owner map in the background every `OWNER_REFRESH_BLOCKS`."""
+    if block_num is not None and block_num % config.OWNER_REFRESH_BLOCKS:
+        return
+    _refreshes.schedule(block_num)
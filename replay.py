@@ -0,0 +1,504 @@
+"""Record/replay harness: capture live node traffic, serve it back from a local
+mock node, and benchmark the full `main.main` pipeline against it.
+
+    python replay.py record traffic.jsonl --duration 600
+    python replay.py serve traffic.jsonl --port 9955 --speed 10
+    python replay.py bench traffic.jsonl --speed 10
+
+The recording is JSON lines: one ``static`` line with the responses needed to
+bootstrap a client (metadata, runtime version, genesis hash, ...), then a
+timeline of ``head`` events (header + block hash), ``pool`` diffs of
+`author_pendingExtrinsics` and ``storage`` snapshots of the subnet reserve and
+owner maps and of the signing accounts' balances, taken at each head.
+
+The mock node replays that timeline at real time or faster, answers the
+subscriptions and storage queries the bot makes, and accepts submissions
+(each lands in the block of the next replayed head, served by
+``chain_getBlock``; `author_submitAndWatchExtrinsic` also reports ``inBlock``
+then).  Storage is answered from the latest replayed snapshot regardless of
+the ``at`` block.  `bench` funds the bot's signing accounts when the recording
+has no balance for them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+import websockets
+
+# Requests whose responses a client needs to bootstrap against the mock
+STATIC_CALLS = [
+    ("system_chain", []),
+    ("system_name", []),
+    ("system_version", []),
+    ("system_properties", []),
+    ("rpc_methods", []),
+    ("state_getRuntimeVersion", []),
+    ("state_getMetadata", []),
+    ("state_call", ["Metadata_metadata_versions", "0x"]),
+    ("state_call", ["Metadata_metadata_at_version", "0x0f000000"]),
+    ("chain_getBlockHash", [0]),
+]
+
+# Storage maps snapshotted at every head
+RECORDED_MAPS = [
+    ("SubtensorModule", "SubnetAlphaIn"),
+    ("SubtensorModule", "SubnetTAO"),
+    ("SubtensorModule", "SubnetOwner"),
+]
+
+# Free balance (planck) `bench` gives signing accounts the recording has no
+# ``System.Account`` entry for
+BENCH_BALANCE = 1_000_000 * 10**9
+
+HEAD_METHODS = {
+    "chain_subscribeNewHeads",
+    "chain_subscribeNewHead",
+    "chain_subscribeAllHeads",
+    "chain_subscribeFinalizedHeads",
+}
+
+
+# --------------------------------------------------------------------------- #
+# Recorder
+# --------------------------------------------------------------------------- #
+def account_key(public_key: bytes) -> str:
+    """Storage key of the ``System.Account`` entry of *public_key*."""
+    import storage
+
+    return storage.map_key("System", "Account", public_key, "Blake2_128Concat")
+
+
+async def record(path: str, duration: float, poll_interval: float) -> None:
+    import rpc
+    import storage
+    import subtensor
+
+    client = rpc.client
+    await client.start()
+    start = time.monotonic()
+    # The signing accounts' balances, so a replay of this recording can stake
+    accounts = [account_key(kp.public_key) for kp in await asyncio.to_thread(subtensor.keypairs)]
+
+    static = []
+    for method, params in STATIC_CALLS:
+        try:
+            result = await client.request(method, params)
+        except rpc.RpcError:
+            continue
+        static.append({"method": method, "params": params, "result": result})
+
+    with open(path, "w") as out:
+        out.write(json.dumps({"type": "static", "responses": static}) + "\n")
+
+        def emit(event: dict) -> None:
+            event["t"] = round(time.monotonic() - start, 6)
+            out.write(json.dumps(event) + "\n")
+
+        async def heads() -> None:
+            sub = await client.subscribe(
+                "chain_subscribeNewHeads", unsubscribe="chain_unsubscribeNewHeads"
+            )
+            async for header in sub:
+                number = int(header["number"], 16)
+                block_hash = await client.request("chain_getBlockHash", [number])
+                emit({"type": "head", "header": header, "hash": block_hash})
+                changes: dict[str, str | None] = {}
+                for pallet, item in RECORDED_MAPS:
+                    changes.update(await storage.read_map(pallet, item, block_hash))
+                changes.update(await storage.read_values(accounts, block_hash))
+                emit({"type": "storage", "hash": block_hash, "changes": changes})
+
+        async def pool() -> None:
+            previous: set[str] = set()
+            while True:
+                current = set(await client.request("author_pendingExtrinsics"))
+                added, removed = current - previous, previous - current
+                if added or removed:
+                    emit({"type": "pool", "added": sorted(added), "removed": sorted(removed)})
+                previous = current
+                await asyncio.sleep(poll_interval)
+
+        tasks = [asyncio.create_task(heads()), asyncio.create_task(pool())]
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            for task in tasks:
+                task.cancel()
+    print(f"Recorded {duration:.0f}s of traffic to {path}")
+
+
+# --------------------------------------------------------------------------- #
+# Mock node
+# --------------------------------------------------------------------------- #
+def _xt_hash(xt_hex: str) -> str:
+    raw = bytes.fromhex(xt_hex[2:] if xt_hex.startswith("0x") else xt_hex)
+    return "0x" + hashlib.blake2b(raw, digest_size=32).hexdigest()
+
+
+class MockNode:
+    def __init__(self, path: str, speed: float = 1.0) -> None:
+        self.speed = speed
+        self.static: list[dict] = []
+        self.timeline: list[dict] = []
+        with open(path) as fh:
+            for line in fh:
+                event = json.loads(line)
+                if event["type"] == "static":
+                    self.static = event["responses"]
+                else:
+                    self.timeline.append(event)
+        self.head: dict | None = None
+        self.head_hash: str | None = None
+        self.block_hashes: dict[int, str] = {}
+        self.pool: dict[str, None] = {}  # insertion-ordered set
+        self.storage: dict[str, str] = {}
+        self._sorted_keys: list[str] | None = None
+        self._sub_ids = itertools.count(1)
+        self._head_subs: list[tuple] = []
+        self._pool_subs: list[tuple] = []
+        self._watches: list[tuple] = []
+        # Submissions waiting for the next head, and what each head included
+        self._queued: list[str] = []
+        self.blocks: dict[str, list[str]] = {}
+        # For benchmarking: when each pool entry was first served / pushed and
+        # when each submission arrived (perf_counter)
+        self.first_served: dict[str, float] = {}
+        self.submissions: list[tuple[float, str]] = []
+
+    # -- static answers ---------------------------------------------------- #
+    def _static(self, method: str, params: list):
+        for match in (
+            lambda r: r["params"] == params,
+            lambda r: r["params"][:1] == params[:1],
+            lambda r: True,
+        ):
+            for resp in self.static:
+                if resp["method"] == method and match(resp):
+                    return True, resp["result"]
+        return False, None
+
+    # -- replay driver ----------------------------------------------------- #
+    async def run(self) -> None:
+        start = time.monotonic()
+        for event in self.timeline:
+            delay = event["t"] / self.speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._apply(event)
+
+    async def _apply(self, event: dict) -> None:
+        kind = event["type"]
+        if kind == "head":
+            self.head, self.head_hash = event["header"], event["hash"]
+            self.block_hashes[int(self.head["number"], 16)] = self.head_hash
+            self.blocks[self.head_hash], self._queued = self._queued, []
+            for ws, sub_id, method in list(self._head_subs):
+                await self._notify(ws, method, sub_id, self.head)
+            watches, self._watches = self._watches, []
+            for ws, sub_id in watches:
+                await self._notify(
+                    ws, "author_extrinsicUpdate", sub_id, {"inBlock": self.head_hash}
+                )
+        elif kind == "pool":
+            for hx in event["removed"]:
+                self.pool.pop(hx, None)
+            for hx in event["added"]:
+                self.pool[hx] = None
+            if self._pool_subs:
+                now = time.perf_counter()
+                for hx in event["added"]:
+                    self.first_served.setdefault(hx, now)
+                for ws, sub_id, method in list(self._pool_subs):
+                    await self._notify(ws, method, sub_id, event["added"])
+        elif kind == "storage":
+            self.storage.update(
+                {k: v for k, v in event["changes"].items() if v is not None}
+            )
+            self._sorted_keys = None
+
+    async def _notify(self, ws, method: str, sub_id: int, result) -> None:
+        try:
+            await ws.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": method,
+                        "params": {"subscription": sub_id, "result": result},
+                    }
+                )
+            )
+        except websockets.ConnectionClosed:
+            pass
+
+    # -- request handling -------------------------------------------------- #
+    def _keys_paged(self, prefix: str, count: int, start: str | None) -> list[str]:
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.storage)
+        keys = self._sorted_keys
+        i = bisect.bisect_right(keys, start) if start else bisect.bisect_left(keys, prefix)
+        out = []
+        while i < len(keys) and keys[i].startswith(prefix) and len(out) < count:
+            out.append(keys[i])
+            i += 1
+        return out
+
+    async def _answer(self, ws, method: str, params: list):
+        if method in HEAD_METHODS:
+            sub_id = next(self._sub_ids)
+            self._head_subs.append((ws, sub_id, "chain_newHead"))
+            return sub_id
+        if method == "state_subscribeRuntimeVersion":
+            sub_id = next(self._sub_ids)
+            _, version = self._static("state_getRuntimeVersion", [])
+            asyncio.create_task(
+                self._notify(ws, "state_runtimeVersion", sub_id, version)
+            )
+            return sub_id
+        if method.endswith("subscribePendingExtrinsics"):
+            sub_id = next(self._sub_ids)
+            self._pool_subs.append((ws, sub_id, "author_pendingExtrinsic"))
+            return sub_id
+        if method == "author_pendingExtrinsics":
+            now = time.perf_counter()
+            for hx in self.pool:
+                self.first_served.setdefault(hx, now)
+            return list(self.pool)
+        if method in ("author_submitExtrinsic", "author_submitAndWatchExtrinsic"):
+            self.submissions.append((time.perf_counter(), params[0]))
+            self._queued.append(params[0])
+            if method == "author_submitExtrinsic":
+                return _xt_hash(params[0])
+            sub_id = next(self._sub_ids)
+            self._watches.append((ws, sub_id))
+            asyncio.create_task(
+                self._notify(ws, "author_extrinsicUpdate", sub_id, "ready")
+            )
+            return sub_id
+        if method == "state_getStorage":
+            return self.storage.get(params[0])
+        if method == "state_queryStorageAt":
+            keys = params[0]
+            return [
+                {
+                    "block": self.head_hash,
+                    "changes": [[k, self.storage.get(k)] for k in keys],
+                }
+            ]
+        if method == "state_getKeysPaged":
+            prefix, count = params[0], params[1]
+            start = params[2] if len(params) > 2 else None
+            return self._keys_paged(prefix, count, start)
+        if method == "chain_getBlockHash" and params and params[0] not in (None, 0):
+            return self.block_hashes.get(int(params[0]), self.head_hash)
+        if method == "chain_getBlock":
+            block_hash = params[0] if params else self.head_hash
+            return {"block": {"header": self.head, "extrinsics": self.blocks.get(block_hash, [])}}
+        if method in ("chain_getHead", "chain_getFinalizedHead"):
+            return self.head_hash
+        if method == "chain_getHeader" and self.head is not None:
+            return self.head
+        if method == "system_accountNextIndex":
+            return 0
+        if method.startswith(("chain_unsubscribe", "state_unsubscribe", "author_unwatch")):
+            return True
+        found, result = self._static(method, params)
+        if found:
+            return result
+        raise LookupError(method)
+
+    async def handler(self, ws) -> None:
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                try:
+                    result = await self._answer(ws, msg["method"], msg.get("params") or [])
+                    reply = {"jsonrpc": "2.0", "id": msg["id"], "result": result}
+                except LookupError:
+                    reply = {
+                        "jsonrpc": "2.0",
+                        "id": msg["id"],
+                        "error": {"code": -32601, "message": "Method not found"},
+                    }
+                await ws.send(json.dumps(reply))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._head_subs = [s for s in self._head_subs if s[0] is not ws]
+            self._pool_subs = [s for s in self._pool_subs if s[0] is not ws]
+            self._watches = [s for s in self._watches if s[0] is not ws]
+
+
+async def serve(path: str, host: str, port: int, speed: float) -> None:
+    node = MockNode(path, speed)
+    async with websockets.serve(node.handler, host, port, max_size=None):
+        print(f"Replaying {path} at {speed}x on ws://{host}:{port}")
+        await node.run()
+        print("Replay finished; still serving (Ctrl-C to stop)")
+        await asyncio.Future()
+
+
+class NodeThread(threading.Thread):
+    """Serve a `MockNode` and replay its timeline from a thread with its own
+    event loop, so nothing the bot blocks its loop on (imports, key
+    derivation, metadata decoding) can stall the node it is talking to."""
+
+    def __init__(self, node: MockNode, host: str, port: int) -> None:
+        super().__init__(name="mock-node", daemon=True)
+        self.node, self.host, self.port = node, host, port
+        self.ready = threading.Event()     # listening
+        self.replayed = threading.Event()  # whole timeline applied
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._done: asyncio.Event | None = None
+
+    def run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        self._loop, self._done = asyncio.get_running_loop(), asyncio.Event()
+        async with websockets.serve(self.node.handler, self.host, self.port, max_size=None):
+            self.ready.set()
+            await self.node.run()
+            self.replayed.set()
+            await self._done.wait()
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._done.set)
+        self.join()
+
+
+# --------------------------------------------------------------------------- #
+# Benchmark
+# --------------------------------------------------------------------------- #
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def funded_accounts(node: MockNode, free: int = BENCH_BALANCE) -> dict[str, str]:
+    """``System.Account`` entries giving each of the bot's signing accounts
+    *free* planck, encoded for the recording's runtime."""
+    from scalecodec.base import ScaleBytes
+
+    import runtime
+    import subtensor
+
+    _, version = node._static("state_getRuntimeVersion", [])
+    _, metadata_hex = node._static("state_getMetadata", [])
+    rt = runtime.Runtime(
+        version["specName"], version["specVersion"], version["transactionVersion"],
+        metadata_hex,
+    )
+    entry = rt.metadata.get_metadata_pallet("System").get_storage_function("Account")
+    value_type = entry.get_value_type_string()
+    # Start from the entry's default so every other field is valid as is
+    info = rt.runtime_config.create_scale_object(
+        value_type, data=ScaleBytes(bytearray(entry.value_object["default"].value_object)),
+        metadata=rt.metadata,
+    ).decode()
+    info["data"]["free"] = free
+    account = rt.runtime_config.create_scale_object(value_type, metadata=rt.metadata)
+    value = str(account.encode(info))
+    return {account_key(kp.public_key): value for kp in subtensor.keypairs()}
+
+
+async def bench(path: str, speed: float, port: int) -> None:
+    # The bot reads its configuration at import time, so point it at the mock
+    # before anything imports `config`.
+    os.environ["WS_URL"] = f"ws://127.0.0.1:{port}"
+    os.environ["RPC_ENDPOINTS"] = ""
+    os.environ.setdefault("METRICS_PORT", "0")
+
+    import main as bot
+    from extrinsic_filter import hex_to_bytes, peek_call_index
+    import runtime
+
+    # The node gets its own thread: the bot's startup blocks its loop at
+    # times, and a node sharing that loop would stall with it
+    node = MockNode(path, speed)
+    # Without a balance every trigger is skipped as unaffordable; entries the
+    # recording has for these accounts replace these as it replays
+    node.storage.update(await asyncio.to_thread(funded_accounts, node))
+    server = NodeThread(node, "127.0.0.1", port)
+    server.start()
+    await asyncio.to_thread(server.ready.wait)
+
+    started = time.perf_counter()
+    runner = asyncio.create_task(bot.main())
+    await asyncio.to_thread(server.replayed.wait)
+    await asyncio.sleep(2)  # let the last detections drain
+    elapsed = time.perf_counter() - started
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    await asyncio.to_thread(server.stop)
+
+    rt = runtime.current()
+    swap_index = rt.call_index("SubtensorModule", "schedule_swap_coldkey")
+    triggers = sorted(
+        t
+        for hx, t in node.first_served.items()
+        if peek_call_index(hex_to_bytes(hx), rt.extra_layout) == swap_index
+    )
+    # Pair each submission with the earliest unanswered trigger before it
+    latencies = []
+    pending = list(triggers)
+    for submitted_at, _ in sorted(node.submissions):
+        if pending and pending[0] <= submitted_at:
+            latencies.append((submitted_at - pending.pop(0)) * 1000)
+    latencies.sort()
+
+    print(f"replayed {len(node.timeline)} events in {elapsed:.1f}s at {speed}x")
+    print(f"pool entries served : {len(node.first_served)} "
+          f"({len(node.first_served) / elapsed:,.0f}/s)")
+    print(f"triggers            : {len(triggers)}")
+    print(f"submissions         : {len(node.submissions)}")
+    if latencies:
+        print("detection->submit ms: "
+              f"p50={_percentile(latencies, 0.5):.1f} "
+              f"p90={_percentile(latencies, 0.9):.1f} "
+              f"p99={_percentile(latencies, 0.99):.1f} "
+              f"max={latencies[-1]:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="record live traffic from WS_URL")
+    rec.add_argument("path")
+    rec.add_argument("--duration", type=float, default=600, help="seconds")
+    rec.add_argument("--poll-interval", type=float, default=0.2, help="seconds")
+
+    srv = commands.add_parser("serve", help="serve a recording as a mock node")
+    srv.add_argument("path")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=9955)
+    srv.add_argument("--speed", type=float, default=1.0)
+
+    bch = commands.add_parser("bench", help="run main.main against a replay")
+    bch.add_argument("path")
+    bch.add_argument("--port", type=int, default=9955)
+    bch.add_argument("--speed", type=float, default=1.0)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(record(args.path, args.duration, args.poll_interval))
+    elif args.command == "serve":
+        asyncio.run(serve(args.path, args.host, args.port, args.speed))
+    else:
+        asyncio.run(bench(args.path, args.speed, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Live in-memory reserve/price table for every subnet.
+
+`watch_new_blocks` calls `reserve_table.schedule_refresh` on each new head;
+the refresh reads the whole `SubnetAlphaIn` and `SubnetTAO` maps at that block
+(batched reads regardless of subnet count), so the staking path can look
+reserves up in O(1) instead of paying two RPC round trips at trigger time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Callable
+
+import config
+import rpc
+import storage
+from coalescer import Coalescer
+
+
+@dataclass(frozen=True, slots=True)
+class Reserves:
+    alpha: int
+    tao: int
+    block: int  # block number the reading was taken at
+
+
+class ReserveTable:
+    def __init__(self) -> None:
+        self._rows: dict[int, Reserves] = {}
+        self._refreshes = Coalescer("Reserve Refresh", self.refresh)
+        self._listeners: list[Callable[[int, str], None]] = []
+
+    def get(self, netuid: int, *, max_age: int | None = None) -> Reserves | None:
+        """Return the cached reserves of *netuid*, or ``None`` when missing or
+        more than *max_age* blocks behind the current head."""
+        row = self._rows.get(netuid)
+        if row is None:
+            return None
+        if max_age is None:
+            max_age = config.RESERVE_MAX_AGE_BLOCKS
+        head = config.current_block
+        if head is not None and head - row.block > max_age:
+            return None
+        return row
+
+    def netuids(self) -> list[int]:
+        return sorted(self._rows)
+
+    def rows(self) -> dict[int, Reserves]:
+        return dict(self._rows)
+
+    async def refresh(self, block_num: int) -> None:
+        block_hash = await rpc.client.request("chain_getBlockHash", [block_num])
+        alpha_map, tao_map = await asyncio.gather(
+            storage.read_map("SubtensorModule", "SubnetAlphaIn", block_hash),
+            storage.read_map("SubtensorModule", "SubnetTAO", block_hash),
+        )
+        alpha = {storage.netuid_of(k): storage.decode_int(v) for k, v in alpha_map.items()}
+        tao = {storage.netuid_of(k): storage.decode_int(v) for k, v in tao_map.items()}
+
+        for netuid, pool_alpha in alpha.items():
+            current = self._rows.get(netuid)
+            if current is not None and current.block > block_num:
+                continue  # a newer reading already landed
+            self._rows[netuid] = Reserves(pool_alpha, tao.get(netuid, 0), block_num)
+
+        for callback in self._listeners:
+            callback(block_num, block_hash)
+
+    def on_refresh(self, callback: Callable[[int, str], None]) -> None:
+        """Call *callback(block_num, block_hash)* after every refresh."""
+        self._listeners.append(callback)
+
+    def schedule_refresh(self, block_num: int) -> None:
+        """Refresh at *block_num* in the background.
+
+        If a refresh is still running the request is coalesced: only the most
+        recent block is read once the current one finishes.
+        """
+        self._refreshes.schedule(block_num)
+
+
+reserve_table = ReserveTable()
@@ -0,0 +1,296 @@
+"""Multiplexed JSON-RPC client over a single WebSocket.
+
+One connection carries every request and subscription: block heads, pool
+reads, storage reads and submissions.  Responses are matched to requests by
+id, subscription notifications are routed by subscription id, and reconnects
+(with back-off and rate limiting) are handled here, once, for everybody.
+Subscriptions survive a reconnect: they are re-issued and keep feeding the
+same `Subscription` object.
+
+There is one client per endpoint (`get`); `client` is the one reads go
+through, which `supervisor` may point at a standby node.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Callable
+
+import websockets
+
+import config
+from telegram import printTG
+
+MAX_RECONNECT_DELAY = 60  # seconds
+
+
+class RpcError(Exception):
+    def __init__(self, error: dict) -> None:
+        self.code = error.get("code")
+        self.message = error.get("message", "")
+        self.data = error.get("data")
+        super().__init__(f"{self.code}: {self.message} {self.data or ''}".rstrip())
+
+
+class Subscription:
+    """Async iterator over the notifications of one subscription."""
+
+    def __init__(self, client: "RpcClient", method: str, params: list,
+                 unsubscribe: str | None, resubscribe: bool) -> None:
+        self.client = client
+        self.method = method
+        self.params = params
+        self.unsubscribe_method = unsubscribe
+        self.resubscribe = resubscribe
+        self.id: str | int | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def _push(self, item) -> None:
+        self._queue.put_nowait(item)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._queue.get()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    async def close(self) -> None:
+        self.client._subs.pop(self.id, None)
+        if self.unsubscribe_method and self.id is not None:
+            try:
+                await self.client.request(self.unsubscribe_method, [self.id])
+            except Exception:
+                pass
+
+
+class RpcClient:
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._ws = None
+        self._ids = itertools.count(1)
+        # request id -> (future, subscription to register on success)
+        self._pending: dict[int, tuple[asyncio.Future, Subscription | None]] = {}
+        self._subs: dict[str | int, Subscription] = {}
+        self._active: list[Subscription] = []
+        self._connected = asyncio.Event()
+        self._runner: asyncio.Task | None = None
+        # Resolved by `detach` to release callers waiting for this connection
+        self._handoff: asyncio.Future | None = None
+        self._reconnects: list[float] = []  # monotonic, last minute only
+        self._disconnect_callbacks: list[Callable[["RpcClient"], None]] = []
+
+    # ------------------------------------------------------------------ #
+    # Connection management
+    # ------------------------------------------------------------------ #
+    async def start(self) -> None:
+        """Start the connection manager and wait for the first connection."""
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+        await self._connected.wait()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def on_disconnect(self, callback: Callable[["RpcClient"], None]) -> None:
+        """Call *callback(client)* whenever the connection drops."""
+        self._disconnect_callbacks.append(callback)
+
+    async def _ready(self) -> None:
+        """Wait for the connection; raises `ConnectionError` when the client is
+        detached in the meantime."""
+        if self._connected.is_set():
+            return
+        if self._handoff is None or self._handoff.done():
+            self._handoff = asyncio.get_running_loop().create_future()
+        connected = asyncio.ensure_future(self._connected.wait())
+        try:
+            await asyncio.wait({connected, self._handoff}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            connected.cancel()
+        if not self._connected.is_set():
+            raise ConnectionError(f"{self.url} detached")
+
+    async def wait_connected(self) -> None:
+        """Wait for the connection, or return early when the client is
+        detached (callers then pick up the new `rpc.client`)."""
+        try:
+            await self._ready()
+        except ConnectionError:
+            pass
+
+    def detach(self) -> None:
+        """Hand this client's readers over to another one: every open
+        subscription, every caller waiting to send and every request still
+        awaiting its answer gets a `ConnectionError`, so the listeners
+        re-subscribe and re-read through the new `rpc.client` instead of
+        waiting on a node that may never answer."""
+        exc = ConnectionError(f"{self.url} detached")
+        self._fail_pending(exc)
+        for sub in self._active:
+            self._subs.pop(sub.id, None)
+            sub._push(exc)
+            if self.connected and sub.unsubscribe_method and sub.id is not None:
+                asyncio.create_task(self._unsubscribe_quietly(sub))
+        self._active.clear()
+        if self._handoff is not None and not self._handoff.done():
+            self._handoff.set_result(None)
+
+    async def _unsubscribe_quietly(self, sub: Subscription) -> None:
+        try:
+            await self.request(sub.unsubscribe_method, [sub.id], timeout=config.PROBE_TIMEOUT)
+        except Exception:
+            pass
+
+    async def _connect(self):
+        """Connect with back‑off *and* rate‑limit to avoid hammering the node."""
+        delay = 1
+        while True:
+            try:
+                config.record_reconnect_attempt()
+                now = time.monotonic()
+                self._reconnects = [t for t in self._reconnects if t > now - 60]
+                self._reconnects.append(now)
+                # Throttled per node, so a dead standby never slows the others
+                if len(self._reconnects) > 20:
+                    await asyncio.sleep(60)
+
+                return await websockets.connect(
+                    self.url, ping_interval=20, ping_timeout=10, max_size=None
+                )
+            except Exception as e:
+                msg = f"[Reconnect Failed] {self.url} retrying in {delay}s: {e}"
+                config.logger.error(msg, exc_info=True)
+                printTG(msg)
+                await asyncio.sleep(delay)
+                delay = min(MAX_RECONNECT_DELAY, delay * 2)
+
+    async def _run(self) -> None:
+        while True:
+            self._ws = await self._connect()
+            self._connected.set()
+            for sub in list(self._active):
+                asyncio.create_task(self._resubscribe(sub))
+            try:
+                async for raw in self._ws:
+                    self._dispatch(json.loads(raw))
+            except Exception as e:
+                msg = f"[WebSocket Closed - {self.url}] {e}"
+                config.logger.warning(msg)
+                printTG(msg)
+            finally:
+                self._connected.clear()
+                ws, self._ws = self._ws, None
+                await ws.close()
+                self._fail_all(ConnectionError(f"connection to {self.url} lost"))
+                for callback in self._disconnect_callbacks:
+                    try:
+                        callback(self)
+                    except Exception as e:
+                        config.logger.error("[Disconnect Callback Error] %s", e, exc_info=True)
+
+    def _fail_pending(self, exc: Exception) -> None:
+        for fut, _ in self._pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+        self._pending.clear()
+
+    def _fail_all(self, exc: Exception) -> None:
+        self._fail_pending(exc)
+        self._subs.clear()
+        for sub in list(self._active):
+            if not sub.resubscribe:
+                self._active.remove(sub)
+                sub._push(exc)
+
+    async def _resubscribe(self, sub: Subscription) -> None:
+        try:
+            await self._send(sub.method, sub.params, sub)
+        except Exception as e:
+            config.logger.error("[Resubscribe Failed] %s %s", sub.method, e, exc_info=True)
+
+    def _dispatch(self, msg: dict) -> None:
+        if "id" in msg and msg["id"] in self._pending:
+            fut, sub = self._pending.pop(msg["id"])
+            if "error" in msg:
+                if not fut.done():
+                    fut.set_exception(RpcError(msg["error"]))
+                return
+            if sub is not None:
+                # Register before anything else is read so no notification
+                # for the new subscription can slip past us
+                sub.id = msg["result"]
+                self._subs[sub.id] = sub
+            if not fut.done():
+                fut.set_result(msg.get("result"))
+            return
+        params = msg.get("params")
+        if isinstance(params, dict) and "subscription" in params:
+            sub = self._subs.get(params["subscription"])
+            if sub is not None:
+                sub._push(params.get("result"))
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def _send(self, method: str, params: list, sub: Subscription | None = None):
+        await self._ready()
+        req_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = (fut, sub)
+        try:
+            await self._ws.send(
+                json.dumps(
+                    {"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}
+                )
+            )
+            return await fut
+        finally:
+            # No-op once answered; drops the slot on send failure or timeout
+            self._pending.pop(req_id, None)
+
+    async def request(self, method: str, params: list | None = None,
+                      timeout: float | None = None):
+        """Send one request and return its ``result`` (raises `RpcError`)."""
+        coro = self._send(method, params or [])
+        if timeout is None:
+            return await coro
+        return await asyncio.wait_for(coro, timeout)
+
+    async def subscribe(self, method: str, params: list | None = None,
+                        unsubscribe: str | None = None,
+                        resubscribe: bool = True) -> Subscription:
+        """Open a subscription; with *resubscribe* it is re-issued after a
+        reconnect, otherwise the connection loss is raised from the iterator."""
+        sub = Subscription(self, method, params or [], unsubscribe, resubscribe)
+        await self._send(method, sub.params, sub)
+        # Only tracked once live, so a reconnect racing the first attempt
+        # can't issue it twice
+        self._active.append(sub)
+        return sub
+
+    async def close_subscription(self, sub: Subscription) -> None:
+        if sub in self._active:
+            self._active.remove(sub)
+        await sub.close()
+
+
+_clients: dict[str, RpcClient] = {}
+
+
+def get(url: str) -> RpcClient:
+    """The one persistent client for *url* (created on first use)."""
+    if url not in _clients:
+        _clients[url] = RpcClient(url)
+    return _clients[url]
+
+
+# Shared by the listeners, the staking path and the storage readers; swapped
+# for a standby by `supervisor` when this node stalls
+client = get(config.WS_URL)
@@ -0,0 +1,220 @@
+"""Declarative trigger rules, compiled into a call-index dispatch table.
+
+Rules are read from ``RULES_PATH`` (YAML).  Each names a call as
+``Pallet.call_name``, optional argument predicates under ``where`` and an
+``action``::
+
+    rules:
+      - name: owner-coldkey-swap
+        call: SubtensorModule.schedule_swap_coldkey
+        where:
+          signer: {owner: true}
+        action: stake
+
+``where`` maps a field (``signer`` or any call argument name) to operators:
+``eq``, ``ne``, ``in``, ``not_in``, ``gt``, ``gte``, ``lt``, ``lte`` and
+``owner`` (whether the value is a subnet-owner coldkey).  Built-in actions
+are ``alert`` (Telegram, optional ``message`` template over the fields) and
+``log``; other modules add theirs with `register_action` (the listener adds
+``stake``).  Any other keys on a rule are passed to its action as options.
+
+Compiled rules are grouped by their 2-byte (pallet index, call index) for
+the live runtime, so matching a pending extrinsic is one dict lookup; the
+table keys double as the prefilter targets.  The table is recompiled after a
+runtime upgrade.
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass, field
+from typing import Callable
+
+import yaml
+
+import config
+import runtime
+from telegram import printTG
+
+# Used when RULES_PATH does not exist: the bot's original behaviour
+DEFAULT_RULES = [
+    {
+        "name": "owner-coldkey-swap",
+        "call": "SubtensorModule.schedule_swap_coldkey",
+        "action": "stake",
+    },
+]
+
+_OPERATORS: dict[str, Callable[[object, object], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "in": lambda value, operand: value in operand,
+    "not_in": lambda value, operand: value not in operand,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "owner": lambda value, operand: (value in config.subnet_coldkeys) == bool(operand),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    name: str
+    pallet: str
+    call: str
+    action: str
+    predicates: tuple[tuple[str, Callable, object], ...] = ()
+    options: dict = field(default_factory=dict)
+
+    def matches(self, fields: dict) -> bool:
+        for name, test, operand in self.predicates:
+            if name not in fields:
+                return False
+            try:
+                if not test(fields[name], operand):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+
+# action name -> handler(rule, fields, ctx)
+_actions: dict[str, Callable[[Rule, dict, dict], None]] = {}
+_rules: list[Rule] = []
+_table: dict[bytes, tuple[Rule, ...]] = {}
+_targets: frozenset[bytes] = frozenset()
+
+
+def register_action(name: str):
+    """Decorator registering ``handler(rule, fields, ctx)`` as action *name*."""
+    def decorator(handler):
+        _actions[name] = handler
+        return handler
+    return decorator
+
+
+@register_action("alert")
+def _alert(rule: Rule, fields: dict, ctx: dict) -> None:
+    template = rule.options.get("message", "{rule}: {call} from {signer}")
+    printTG(template.format_map(_Fields(fields, rule)))
+
+
+@register_action("log")
+def _log(rule: Rule, fields: dict, ctx: dict) -> None:
+    print(f"[{rule.name}] {rule.pallet}.{rule.call} {fields}")
+
+
+class _Fields(dict):
+    """Template namespace: the call's fields plus ``rule``/``call``; unknown
+    names render as ``?`` instead of raising."""
+
+    def __init__(self, fields: dict, rule: Rule) -> None:
+        super().__init__(fields, rule=rule.name, call=f"{rule.pallet}.{rule.call}")
+
+    def __missing__(self, key):
+        return "?"
+
+
+def parse_rule(spec: dict) -> Rule:
+    try:
+        pallet, call = spec["call"].split(".", 1)
+        action = spec["action"]
+    except (KeyError, ValueError, AttributeError) as e:
+        raise ValueError(f"rule {spec!r} needs call: Pallet.call and action") from e
+    name = spec.get("name") or f"{pallet}.{call}:{action}"
+    predicates = []
+    for field_name, tests in (spec.get("where") or {}).items():
+        if not isinstance(tests, dict):
+            tests = {"eq": tests}
+        for op, operand in tests.items():
+            if op not in _OPERATORS:
+                raise ValueError(f"rule {name}: unknown operator {op!r}")
+            if op in ("in", "not_in"):
+                operand = frozenset(operand)
+            predicates.append((field_name, _OPERATORS[op], operand))
+    options = {
+        k: v for k, v in spec.items() if k not in ("name", "call", "where", "action")
+    }
+    return Rule(name, pallet, call, action, tuple(predicates), options)
+
+
+def load_rules(path: str = config.RULES_PATH) -> list[Rule]:
+    try:
+        with open(path) as fh:
+            data = yaml.safe_load(fh) or {}
+    except FileNotFoundError:
+        return [parse_rule(spec) for spec in DEFAULT_RULES]
+    return [parse_rule(spec) for spec in data.get("rules") or []]
+
+
+def compile_table(rules: list[Rule], rt: runtime.Runtime) -> dict[bytes, tuple[Rule, ...]]:
+    """Group *rules* by their call index in *rt*."""
+    table: dict[bytes, list[Rule]] = {}
+    for rule in rules:
+        if rule.action not in _actions:
+            raise ValueError(f"rule {rule.name}: unknown action {rule.action!r}")
+        table.setdefault(rt.call_index(rule.pallet, rule.call), []).append(rule)
+    return {index: tuple(group) for index, group in table.items()}
+
+
+def load(path: str = config.RULES_PATH) -> None:
+    """Read the rule file and compile it for the live runtime."""
+    global _rules, _table, _targets
+    rules = load_rules(path)
+    _table = compile_table(rules, runtime.current())
+    _targets = frozenset(_table)
+    _rules = rules
+    print(f"Loaded {len(rules)} trigger rules on {len(_table)} calls")
+
+
+def _recompile(rt: runtime.Runtime) -> None:
+    global _table, _targets
+    kept = []
+    for rule in _rules:
+        if _has_call(rt, rule):
+            kept.append(rule)
+        else:
+            msg = f"[Rules Compile Error] {rule.name}: {rule.pallet}.{rule.call} gone after upgrade"
+            config.logger.error(msg)
+            printTG(msg)
+    _table = compile_table(kept, rt)
+    _targets = frozenset(_table)
+
+
+def _has_call(rt: runtime.Runtime, rule: Rule) -> bool:
+    try:
+        rt.call_index(rule.pallet, rule.call)
+    except KeyError:
+        return False
+    return True
+
+
+runtime.on_swap(_recompile)
+
+
+def targets() -> frozenset[bytes]:
+    """Call indices any rule is interested in (the prefilter targets)."""
+    return _targets
+
+
+def call_fields(value: dict) -> dict:
+    """``signer`` plus every call argument of decoded extrinsic *value*."""
+    fields = {arg["name"]: arg["value"] for arg in value["call"]["call_args"]}
+    fields["signer"] = value.get("address")
+    return fields
+
+
+def dispatch(value: dict, ctx: dict | None = None) -> list[Rule]:
+    """Run the action of every rule matching decoded extrinsic *value*; returns
+    the rules that fired."""
+    group = _table.get(bytes.fromhex(value["call"]["call_index"][2:]))
+    if not group:
+        return []
+    fields = call_fields(value)
+    fired = []
+    for rule in group:
+        if rule.matches(fields):
+            _actions[rule.action](rule, fields, ctx or {})
+            fired.append(rule)
+    return fired
@@ -0,0 +1,174 @@
+"""Runtime metadata: on-disk cache keyed by spec version, live upgrade hot-swap.
+
+`load()` asks the node for its runtime version and decodes the matching
+metadata from ``METADATA_CACHE_DIR`` when it is there, so a warm start never
+downloads the multi-megabyte metadata blob.  `watch_upgrades()` follows
+``state_subscribeRuntimeVersion``; on a new spec version it fetches and
+decodes the new metadata off the event loop, then swaps it in with a single
+assignment.  Everything derived from metadata (call indices, the signed
+extension layout, storage hashers, the decoder) is read through `current()`,
+so callers always see one consistent snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Callable
+
+from scalecodec.base import ScaleBytes
+
+import config
+import rpc
+from atomic import atomic_write
+from decoder_pool import decode_value, load_runtime
+from extrinsic_filter import extra_layout
+from telegram import printTG
+
+
+class Runtime:
+    """Decoded metadata for one spec version plus what the bot derives from it."""
+
+    def __init__(self, spec_name: str, spec_version: int, transaction_version: int,
+                 metadata_hex: str) -> None:
+        self.spec_name = spec_name
+        self.spec_version = spec_version
+        self.transaction_version = transaction_version
+        self.metadata_hex = metadata_hex
+        self.runtime_config, self.metadata = load_runtime(metadata_hex, config.SS58_FORMAT)
+        self.extra_layout = extra_layout(self.metadata.get_signed_extensions().keys())
+        self._call_indices: dict[tuple[str, str], bytes] = {}
+
+    def call_index(self, module: str, function: str) -> bytes:
+        """Return the 2-byte (pallet index, call index) of *module.function*."""
+        key = (module, function)
+        index = self._call_indices.get(key)
+        if index is None:
+            pallet = self.metadata.get_metadata_pallet(module)
+            if pallet is None or not pallet['calls'].value_object:
+                raise KeyError(f"{module} has no calls in runtime metadata")
+            calls = self.runtime_config.create_scale_object(
+                pallet['calls'].value_object.get_type_string()
+            )
+            call = calls.scale_info_type['def'][1].get_variant_by_name(function)
+            if call is None:
+                raise KeyError(f"{module}.{function} not in runtime metadata")
+            index = self._call_indices[key] = bytes(
+                [pallet.value['index'], call.value['index']]
+            )
+        return index
+
+    def decode(self, hex_string: str) -> dict:
+        return decode_value(self.runtime_config, self.metadata, hex_string)
+
+    def decode_storage(self, module: str, item: str, hex_string: str):
+        """Decode the raw value of storage item *module.item*."""
+        entry = self.metadata.get_metadata_pallet(module).get_storage_function(item)
+        obj = self.runtime_config.create_scale_object(
+            entry.get_value_type_string(), data=ScaleBytes(hex_string), metadata=self.metadata
+        )
+        return obj.decode()
+
+
+_current: Runtime | None = None
+_ready = asyncio.Event()
+_swap_callbacks: list[Callable[[Runtime], None]] = []
+
+
+def current() -> Runtime:
+    if _current is None:
+        raise RuntimeError("Runtime metadata not loaded; await runtime.load() first")
+    return _current
+
+
+def install(rt: Runtime) -> None:
+    """Make *rt* the live runtime and notify swap listeners."""
+    global _current
+    previous, _current = _current, rt
+    _ready.set()
+    if previous is not None:
+        for callback in _swap_callbacks:
+            try:
+                callback(rt)
+            except Exception as e:
+                config.logger.error("[Runtime Swap Callback Error] %s", e, exc_info=True)
+
+
+def on_swap(callback: Callable[[Runtime], None]) -> None:
+    """Call *callback(new_runtime)* after every runtime upgrade."""
+    _swap_callbacks.append(callback)
+
+
+async def wait_ready() -> Runtime:
+    await _ready.wait()
+    return current()
+
+
+def _cache_path(spec_name: str, spec_version: int) -> str:
+    return os.path.join(config.METADATA_CACHE_DIR, f"{spec_name}-{spec_version}.scale")
+
+
+def load_cached(spec_name: str, spec_version: int) -> str | None:
+    try:
+        with open(_cache_path(spec_name, spec_version), "rb") as fh:
+            return "0x" + fh.read().hex()
+    except FileNotFoundError:
+        return None
+
+
+def save_cached(spec_name: str, spec_version: int, metadata_hex: str) -> None:
+    os.makedirs(config.METADATA_CACHE_DIR, exist_ok=True)
+    with atomic_write(_cache_path(spec_name, spec_version), "wb") as fh:
+        fh.write(bytes.fromhex(metadata_hex[2:]))
+
+
+async def build(version: dict, block_hash: str | None = None) -> Runtime:
+    """The `Runtime` for *version* (a ``state_getRuntimeVersion`` result),
+    from the disk cache or fetched at *block_hash*."""
+    spec_name, spec_version = version["specName"], version["specVersion"]
+    metadata_hex = load_cached(spec_name, spec_version)
+    cached = metadata_hex is not None
+    if not cached:
+        params = [block_hash] if block_hash else []
+        metadata_hex = await rpc.client.request("state_getMetadata", params)
+    # Decoding the metadata takes a while; keep the event loop responsive
+    rt = await asyncio.to_thread(
+        Runtime, spec_name, spec_version, version["transactionVersion"], metadata_hex
+    )
+    if not cached:
+        save_cached(spec_name, spec_version, metadata_hex)
+    return rt
+
+
+async def load() -> Runtime:
+    """Load the runtime the node is currently on (from cache when possible)."""
+    version = await rpc.client.request("state_getRuntimeVersion")
+    rt = await build(version)
+    install(rt)
+    return rt
+
+
+async def watch_upgrades() -> None:
+    """Swap in new metadata whenever the node reports a new spec version."""
+    while True:
+        try:
+            sub = await rpc.client.subscribe(
+                "state_subscribeRuntimeVersion",
+                unsubscribe="state_unsubscribeRuntimeVersion",
+            )
+            async for version in sub:
+                if _current is not None and version["specVersion"] == _current.spec_version:
+                    continue
+                block_hash = await rpc.client.request("chain_getBlockHash")
+                rt = await build(version, block_hash)
+                install(rt)
+                msg = f"Runtime upgraded to {rt.spec_name} v{rt.spec_version}"
+                print(msg)
+                printTG(msg)
+        except ConnectionError:
+            await rpc.client.wait_connected()
+        except Exception as e:
+            msg = f"[Runtime Upgrade Error] {e}"
+            config.logger.error(msg, exc_info=True)
+            printTG(msg)
+            await asyncio.sleep(3)
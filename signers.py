@@ -0,0 +1,140 @@
+"""Pool of signing accounts, each with its own nonce track and balance.
+
+With several accounts configured (``MNEMONICS``), each order is signed by an
+idle account, meaning one with nothing in flight.  A stuck or rejected
+transaction then only holds up its own account's nonce sequence, and stakes
+on several subnets can land in the same block.  When every account is busy
+the order goes to the least loaded one that can pay for it.
+
+Free balances are read from ``System.Account`` on `sync()` and again after
+each order resolves.  In between, the amount of every order in flight is
+held against its account in memory, so choosing an account never waits on
+the node.  All accounts share one `ChainHead`; the first account follows the
+head for everyone.  Keys are derived by `load_keys` in a worker thread, so
+startup can overlap it with connecting to the node.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+import config
+import metrics
+import runtime
+import storage
+from coalescer import Coalescer
+from helpers import storage_key
+from signing import ChainHead, SigningContext
+
+
+class Account:
+    def __init__(self, context: SigningContext) -> None:
+        self.context = context
+        self.free: int | None = None  # planck, as of the last balance read
+        self.committed = 0            # planck held by orders in flight
+        self.in_flight = 0
+
+    @property
+    def address(self) -> str:
+        return self.context.keypair.ss58_address
+
+    @property
+    def available(self) -> int | None:
+        """Free balance not yet committed; ``None`` until read."""
+        return None if self.free is None else self.free - self.committed
+
+    def can_afford(self, amount: int) -> bool:
+        # An unknown balance does not block trading; the node has the last word
+        available = self.available
+        return available is None or available >= amount + config.FEE_RESERVE
+
+
+class SignerPool:
+    def __init__(self, size: int, load_keypairs: Callable[[], list]) -> None:
+        """*size* accounts whose keypairs *load_keypairs()* derives (blocking)."""
+        head = ChainHead()
+        self.accounts = [Account(SigningContext(None, head)) for _ in range(size)]
+        self._load_keypairs = load_keypairs
+        self._keys_task: asyncio.Task | None = None
+        self._synced = asyncio.Event()
+        self._refreshes = Coalescer("Balance Refresh", self.refresh_balances)
+
+    @property
+    def primary(self) -> Account:
+        return self.accounts[0]
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def load_keys(self) -> asyncio.Task:
+        """Derive the keypairs in a thread (once); await the returned task."""
+        if self._keys_task is None:
+            self._keys_task = asyncio.create_task(self._load_keys())
+        return self._keys_task
+
+    async def _load_keys(self) -> None:
+        keypairs = await asyncio.to_thread(self._load_keypairs)
+        for account, keypair in zip(self.accounts, keypairs):
+            account.context.keypair = keypair
+
+    async def sync(self) -> None:
+        """Read the chain head once, then every account's nonce and balance."""
+        await self.load_keys()
+        await self.primary.context.sync()
+        await asyncio.gather(
+            *(account.context.resync_nonce() for account in self.accounts[1:]),
+            self.refresh_balances(),
+        )
+        self._synced.set()
+
+    async def wait_synced(self) -> None:
+        await self._synced.wait()
+
+    def schedule_head(self, block_number: int) -> None:
+        self.primary.context.schedule_head(block_number)
+
+    async def refresh_balances(self) -> None:
+        """Read the free balance of every account in one round trip."""
+        keys = {
+            account: storage_key(
+                "System", "Account", account.context.keypair.public_key
+            )
+            for account in self.accounts
+        }
+        values = await storage.read_values(list(keys.values()))
+        rt = runtime.current()
+        for account, key in keys.items():
+            value = values[key]
+            account.free = (
+                int(rt.decode_storage("System", "Account", value)["data"]["free"])
+                if value else 0
+            )
+
+    def schedule_refresh(self) -> None:
+        """Refresh balances in the background, coalescing bursts of calls."""
+        self._refreshes.schedule()
+
+    def acquire(self, amount: int) -> Account | None:
+        """Pick an account for an order of *amount* planck and hold the amount
+        against it; ``None`` when no account can afford it."""
+        funded = [a for a in self.accounts if a.can_afford(amount)]
+        if not funded:
+            return None
+        # Idle accounts first, then the least loaded; ties go to the richest
+        account = min(funded, key=lambda a: (a.in_flight, -(a.available or 0)))
+        self.hold(account, amount)
+        return account
+
+    def hold(self, account: Account, amount: int) -> None:
+        account.committed += amount
+        account.in_flight += 1
+
+    def release(self, account: Account, amount: int) -> None:
+        """The order holding *amount* on *account* resolved either way."""
+        account.committed -= amount
+        account.in_flight -= 1
+        self.schedule_refresh()
+
+    def idle(self) -> int:
+        return sum(1 for a in self.accounts if a.in_flight == 0)
@@ -0,0 +1,145 @@
+"""Local signing context: sign extrinsics without any RPC round trip.
+
+`create_signed_extrinsic` on a substrate client fetches the account nonce,
+runtime version, genesis hash and era block hash before every signature.
+`SigningContext` keeps all of these locally instead: the genesis hash and
+nonce are read once by `sync()`, the era block follows the chain head
+(`schedule_head`, called by the block watcher), and spec/transaction versions
+and metadata come from `runtime.current()`.  Nonces are handed out
+optimistically so several stakes can go out in the same block; a
+``Stale``/``Future``/``Priority is too low`` rejection resyncs the nonce from
+the node (`system_accountNextIndex` counts the account's pool transactions).
+Contexts for several accounts can share one `ChainHead`, so the head is
+followed once for all of them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+import config
+import extrinsic_builder
+import rpc
+import runtime
+from coalescer import Coalescer
+
+# Invalid-transaction RPC errors that mean our local nonce is off
+_NONCE_ERRORS = ("outdated", "stale", "future", "priority is too low")
+PRIORITY_TOO_LOW = 1014
+
+
+def is_nonce_error(exc: BaseException) -> bool:
+    if not isinstance(exc, rpc.RpcError):
+        return False
+    if exc.code == PRIORITY_TOO_LOW:
+        return True
+    text = f"{exc.message} {exc.data or ''}".lower()
+    return any(marker in text for marker in _NONCE_ERRORS)
+
+
+@dataclass(slots=True)
+class ChainHead:
+    genesis_hash: str | None = None
+    block_number: int | None = None  # era birth block and its hash
+    block_hash: str | None = None
+
+
+class SigningContext:
+    def __init__(self, keypair, head: ChainHead | None = None) -> None:
+        self.keypair = keypair
+        self.head = head if head is not None else ChainHead()
+        self._nonce: int | None = None
+        self._heads = Coalescer("Signing Head", self._fetch_head)
+
+    @property
+    def genesis_hash(self) -> str | None:
+        return self.head.genesis_hash
+
+    @property
+    def block_number(self) -> int | None:
+        return self.head.block_number
+
+    @property
+    def block_hash(self) -> str | None:
+        return self.head.block_hash
+
+    @property
+    def ready(self) -> bool:
+        return None not in (self.genesis_hash, self.block_hash, self._nonce)
+
+    async def sync(self) -> None:
+        """Read the genesis hash, chain head and account nonce from the node."""
+        header = await rpc.client.request("chain_getHeader")
+        block_number = int(header["number"], 16)
+        self.head.genesis_hash, block_hash = await asyncio.gather(
+            rpc.client.request("chain_getBlockHash", [0]),
+            rpc.client.request("chain_getBlockHash", [block_number]),
+        )
+        self._set_head(block_number, block_hash)
+        await self.resync_nonce()
+
+    async def resync_nonce(self) -> int:
+        self._nonce = await rpc.client.request(
+            "system_accountNextIndex", [self.keypair.ss58_address]
+        )
+        return self._nonce
+
+    @property
+    def nonce(self) -> int | None:
+        """The nonce `next_nonce` will hand out next."""
+        return self._nonce
+
+    def next_nonce(self) -> int:
+        """Hand out the next nonce without waiting for earlier ones to land."""
+        if self._nonce is None:
+            raise RuntimeError("Signing context not synced; await sync() first")
+        nonce, self._nonce = self._nonce, self._nonce + 1
+        return nonce
+
+    def _set_head(self, block_number: int, block_hash: str) -> None:
+        head = self.head
+        if head.block_number is None or block_number >= head.block_number:
+            head.block_number, head.block_hash = block_number, block_hash
+
+    def schedule_head(self, block_number: int) -> None:
+        """Move the era birth block to *block_number* once its hash is known.
+
+        Coalesced like the reserve refresh: only the newest pending block is
+        fetched once the current fetch finishes.
+        """
+        self._heads.schedule(block_number)
+
+    async def _fetch_head(self, block_number: int) -> None:
+        block_hash = await rpc.client.request("chain_getBlockHash", [block_number])
+        self._set_head(block_number, block_hash)
+
+    def compose_call(self, module: str, function: str, params: dict):
+        rt = runtime.current()
+        return extrinsic_builder.compose_call(
+            rt.runtime_config, rt.metadata, module, function, params
+        )
+
+    def sign(self, call, *, tip: int = 0, period: int = config.ERA_PERIOD,
+             nonce: int | None = None):
+        """Sign *call* with a mortal era born at the latest known head.
+
+        Takes the next optimistic nonce unless *nonce* is given."""
+        if not self.ready:
+            raise RuntimeError("Signing context not synced; await sync() first")
+        rt = runtime.current()
+        if nonce is None:
+            nonce = self.next_nonce()
+        return extrinsic_builder.signed_extrinsic(
+            rt.runtime_config,
+            rt.metadata,
+            self.keypair,
+            call,
+            era={"period": period, "current": self.block_number},
+            nonce=nonce,
+            tip=tip,
+            spec_version=rt.spec_version,
+            transaction_version=rt.transaction_version,
+            genesis_hash=self.genesis_hash,
+            block_hash=self.block_hash,
+        )
@@ -0,0 +1,141 @@
+"""Vectorised stake sizing for every subnet from the cached reserves.
+
+Each subnet pool is constant product: staking ``x`` TAO into a pool holding
+``T`` TAO and ``A`` alpha returns ``A * x / (T + x)`` alpha and moves the
+price from ``T / A`` to ``(T + x)**2 / (T * A)``.  The limit price we sign
+caps that post-trade price at ``spot * SLIPPAGE``, so the largest stake that
+fits is ``T * (sqrt(SLIPPAGE) - 1)``.
+
+`SizingTable.rebuild` evaluates all of this for every subnet in a handful of
+NumPy operations on each reserve refresh; at trigger time `get` is an array
+lookup.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+import config
+import metrics
+from reserves import Reserves, reserve_table
+
+
+@dataclass(frozen=True, slots=True)
+class Sizing:
+    netuid: int
+    block: int
+    spot: float          # TAO per alpha before our stake
+    amount: int          # planck to stake: STAKE_AMOUNT capped at max_amount
+    max_amount: int      # largest stake whose post-trade price fits SLIPPAGE
+    alpha_out: int       # expected alpha for `amount`
+    impact: float        # effective price / spot - 1 for `amount`
+    limit_price: int     # signed limit, spot * SLIPPAGE in nano units
+    active: bool         # passes the pool-alpha and minimum-size gates
+
+
+def size(tao, alpha, amount, slippage: float) -> dict[str, np.ndarray]:
+    """Evaluate the sizing formulas elementwise over reserve arrays."""
+    tao = np.asarray(tao, dtype=np.float64)
+    alpha = np.asarray(alpha, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spot = np.where(alpha > 0, tao / alpha, 0.0)
+        max_amount = np.floor(tao * (np.sqrt(slippage) - 1.0))
+        stake = np.minimum(np.float64(amount), max_amount)
+        alpha_out = np.where(tao + stake > 0, alpha * stake / (tao + stake), 0.0)
+        impact = np.where(tao > 0, stake / tao, np.inf)  # effective/spot - 1 == x/T
+    return {
+        "spot": spot,
+        "amount": stake,
+        "max_amount": max_amount,
+        "alpha_out": np.floor(alpha_out),
+        "impact": impact,
+        "limit_price": np.floor(spot * slippage * config.NANO),
+    }
+
+
+class SizingTable:
+    def __init__(self) -> None:
+        self.block: int | None = None
+        self._index = np.full(0, -1, dtype=np.int64)  # netuid -> row, -1 if absent
+        self._netuids = np.zeros(0, dtype=np.int64)
+        self._cols: dict[str, np.ndarray] = {}
+
+    def rebuild(self, block_num: int, rows: dict[int, Reserves]) -> None:
+        start = time.perf_counter()
+        netuids = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        tao = np.fromiter((r.tao for r in rows.values()), dtype=np.float64, count=len(rows))
+        alpha = np.fromiter((r.alpha for r in rows.values()), dtype=np.float64, count=len(rows))
+        cols = size(tao, alpha, config.STAKE_AMOUNT, float(config.SLIPPAGE))
+        # Rows keep the block they were read at: a subnet missing from this
+        # refresh keeps its older reading and must age out on its own
+        cols["block"] = np.fromiter(
+            (r.block for r in rows.values()), dtype=np.int64, count=len(rows)
+        )
+        cols["active"] = (alpha >= config.MIN_POOL_ALPHA) & (
+            cols["amount"] >= config.MIN_STAKE_AMOUNT
+        )
+
+        index = np.full(int(netuids.max()) + 1 if len(netuids) else 0, -1, dtype=np.int64)
+        index[netuids] = np.arange(len(netuids))
+        # Publish in one go so readers never see a half-built table
+        self._index, self._netuids, self._cols, self.block = index, netuids, cols, block_num
+        metrics.since("sizing", start)
+
+    def get(self, netuid: int, *, max_age: int | None = None) -> Sizing | None:
+        """Sizing for *netuid*, or ``None`` when missing or when its reserves
+        were read more than *max_age* blocks behind the current head."""
+        index, cols = self._index, self._cols
+        if not 0 <= netuid < len(index) or index[netuid] < 0:
+            return None
+        i = index[netuid]
+        block = int(cols["block"][i])
+        if max_age is None:
+            max_age = config.RESERVE_MAX_AGE_BLOCKS
+        if config.current_block is not None and config.current_block - block > max_age:
+            return None
+        return Sizing(
+            netuid=netuid,
+            block=block,
+            spot=float(cols["spot"][i]),
+            amount=int(cols["amount"][i]),
+            max_amount=int(cols["max_amount"][i]),
+            alpha_out=int(cols["alpha_out"][i]),
+            impact=float(cols["impact"][i]),
+            limit_price=int(cols["limit_price"][i]),
+            active=bool(cols["active"][i]),
+        )
+
+    def active_netuids(self) -> list[int]:
+        if not self._cols:
+            return []
+        return self._netuids[self._cols["active"]].tolist()
+
+
+def size_one(netuid: int, block: int, tao: int, alpha: int) -> Sizing:
+    """Scalar sizing for reserves fetched outside the table (cache misses)."""
+    cols = size([tao], [alpha], config.STAKE_AMOUNT, float(config.SLIPPAGE))
+    amount = int(cols["amount"][0])
+    return Sizing(
+        netuid=netuid,
+        block=block,
+        spot=float(cols["spot"][0]),
+        amount=amount,
+        max_amount=int(cols["max_amount"][0]),
+        alpha_out=int(cols["alpha_out"][0]),
+        impact=float(cols["impact"][0]),
+        limit_price=int(cols["limit_price"][0]),
+        active=alpha >= config.MIN_POOL_ALPHA and amount >= config.MIN_STAKE_AMOUNT,
+    )
+
+
+sizing_table = SizingTable()
+
+
+def _on_reserves(block_num: int, block_hash: str) -> None:
+    sizing_table.rebuild(block_num, reserve_table.rows())
+
+
+reserve_table.on_refresh(_on_reserves)
@@ -0,0 +1,159 @@
+"""Per-block book of pre-signed `add_stake` extrinsics, one per subnet.
+
+With ``STAKE_BOOK`` enabled, every reserve refresh (one per new head) prices
+and signs a mortal stake for each subnet at that block's reserves, spread over
+``STAKE_BOOK_WORKERS`` processes.  Every entry carries the signer's next
+nonce, so a trigger costs a dictionary lookup and a send; after one entry is
+used the rest of the book is stale until the next rebuild, and further
+triggers fall back to signing live.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import config
+import extrinsic_builder
+import metrics
+import runtime
+from coalescer import Coalescer
+from reserves import Reserves, reserve_table
+
+
+@dataclass(frozen=True, slots=True)
+class PreSigned:
+    netuid: int
+    params: dict      # the signed `add_stake` call arguments
+    xt_hex: str
+    xt_hash: str
+
+
+@dataclass(frozen=True, slots=True)
+class _Book:
+    block: int         # era birth block
+    nonce: int
+    spec_version: int
+    entries: dict[int, PreSigned]
+
+
+class StakeBook:
+    def __init__(self, signer, params_for: Callable[[int, Reserves], dict | None],
+                 workers: int = config.STAKE_BOOK_WORKERS) -> None:
+        """*params_for(netuid, reserves)* returns the `add_stake` arguments for
+        *netuid*, or ``None`` to leave the subnet out of the book."""
+        self.signer = signer
+        self.params_for = params_for
+        self.workers = workers
+        self._book: _Book | None = None
+        self._executor: ProcessPoolExecutor | None = None
+        self._rebuilds = Coalescer("Stake Book", self.rebuild)
+        runtime.on_swap(self._on_runtime_swap)
+
+    def __len__(self) -> int:
+        return len(self._book.entries) if self._book is not None else 0
+
+    def peek(self, netuid: int) -> PreSigned | None:
+        """The pre-signed stake for *netuid* if it can still land, without
+        consuming its nonce; ``None`` when the caller has to sign live."""
+        book = self._book
+        if book is None or netuid not in book.entries:
+            return None
+        head = config.current_block or book.block
+        if (
+            book.nonce != self.signer.nonce
+            or book.spec_version != runtime.current().spec_version
+            or head - book.block >= config.ERA_PERIOD - 1
+        ):
+            return None
+        return book.entries[netuid]
+
+    def take(self, netuid: int) -> PreSigned | None:
+        """Like `peek`, but consumes the entry's nonce when there is one."""
+        presigned = self.peek(netuid)
+        if presigned is not None:
+            self.signer.next_nonce()
+        return presigned
+
+    def schedule(self, block_num: int, block_hash: str) -> None:
+        """Rebuild for *block_num* in the background, coalescing like the
+        reserve refresh that calls it."""
+        self._rebuilds.schedule(block_num, block_hash)
+
+    async def rebuild(self, block_num: int, block_hash: str) -> None:
+        signer = self.signer
+        if signer.genesis_hash is None or signer.nonce is None:
+            return
+        start = time.perf_counter()
+        rt = runtime.current()
+        nonce = signer.nonce
+        common = {
+            "era": {"period": config.ERA_PERIOD, "current": block_num},
+            "nonce": nonce,
+            "tip": config.TIP_AMOUNT,
+            "spec_version": rt.spec_version,
+            "transaction_version": rt.transaction_version,
+            "genesis_hash": signer.genesis_hash,
+            "block_hash": block_hash,
+        }
+        calls = []
+        for netuid in reserve_table.netuids():
+            row = reserve_table.get(netuid)
+            params = self.params_for(netuid, row) if row is not None else None
+            if params is not None:
+                calls.append((netuid, "SubtensorModule", "add_stake", params))
+
+        signed = await self._sign(rt, common, calls)
+        params = {netuid: p for netuid, _, _, p in calls}
+        self._book = _Book(
+            block_num,
+            nonce,
+            rt.spec_version,
+            {
+                netuid: PreSigned(netuid, params[netuid], xt_hex, xt_hash)
+                for netuid, xt_hex, xt_hash in signed
+            },
+        )
+        metrics.since("book_build", start)
+
+    async def _sign(self, rt, common: dict, calls: list[tuple]) -> list[tuple]:
+        if self.workers <= 0:
+            out = []
+            for netuid, module, function, params in calls:
+                call = extrinsic_builder.compose_call(
+                    rt.runtime_config, rt.metadata, module, function, params
+                )
+                xt = extrinsic_builder.signed_extrinsic(
+                    rt.runtime_config, rt.metadata, self.signer.keypair, call, **common
+                )
+                out.append((netuid, str(xt.data), f"0x{xt.extrinsic_hash.hex()}"))
+            return out
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=extrinsic_builder.init_worker,
+                initargs=(rt.metadata_hex, config.SS58_FORMAT, self.signer.keypair.mnemonic),
+            )
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(calls) // self.workers))  # one chunk per worker
+        chunks = [calls[i : i + size] for i in range(0, len(calls), size)]
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, extrinsic_builder.sign_calls, common, c)
+                for c in chunks
+            )
+        )
+        return [entry for chunk in results for entry in chunk]
+
+    def _on_runtime_swap(self, rt: runtime.Runtime) -> None:
+        # Workers hold the old metadata; the book's spec check already retires
+        # entries signed for the old runtime
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
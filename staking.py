@@ -1,59 +1,321 @@
 from __future__ import annotations
 
-from decimal import Decimal
+import asyncio
+import time
 
+import broadcast
 import config
-from helpers import get_pool_reserves
-from subtensor import keypair, substrate
+import inclusion
+import metrics
+import orders
+import rpc
+import subtensor
+from helpers import fetch_pool_reserves
+from reserves import Reserves, reserve_table
+from sizing import Sizing, size_one, sizing_table
+from signers import Account, SignerPool
+from signing import SigningContext, is_nonce_error
+from stake_book import StakeBook
 from telegram import printTG
 
+# One nonce track and balance per signing account; nonce, genesis, head and
+# runtime versions are all kept locally
+signers = SignerPool(len(config.MNEMONICS), subtensor.keypairs)
+# The first account, which also signs the stake book
+signer = signers.primary.context
 
-def _price_per_alpha(pool_tao: int, pool_alpha: int) -> Decimal:
-    """Return TAO/alpha as a high‑precision Decimal."""
-    return Decimal(pool_tao) / Decimal(pool_alpha)
+# extrinsic hash -> background task awaiting its inclusion
+_in_flight: dict[str, asyncio.Task] = {}
+metrics.register_gauge("in_flight_orders", lambda: len(_in_flight))
+metrics.register_gauge("idle_signers", signers.idle)
 
 
-def add_stake(netuid: int) -> bool:
-    pool_alpha, pool_tao = get_pool_reserves(netuid)
+def _stake_params(sized: Sizing) -> dict:
+    return {
+        "validator_hotkey": config.VALIDATOR_HOTKEY,
+        "amount": sized.amount,
+        "limit_price": sized.limit_price,
+        "netuid": sized.netuid,
+    }
 
-    if pool_alpha < 10 ** 15:  # 1 Pα threshold
-        msg = "Low alpha likely not active, not staking"
+
+def _book_params(netuid: int, reserves: Reserves) -> dict | None:
+    sized = sizing_table.get(netuid)
+    if sized is None or not sized.active:
+        return None
+    return _stake_params(sized)
+
+
+# Pre-signed stakes for every subnet, rebuilt on each reserve refresh
+book = StakeBook(signer, _book_params)
+if config.STAKE_BOOK:
+    reserve_table.on_refresh(book.schedule)
+
+
+def _sign_stake(params: dict, context: SigningContext) -> tuple[str, str]:
+    """Compose and sign `add_stake` live; returns (extrinsic hex, hash)."""
+    t = time.perf_counter()
+    call = context.compose_call("SubtensorModule", "add_stake", params)
+    t = metrics.since("compose", t)
+    extrinsic = context.sign(call, tip=config.TIP_AMOUNT)
+    metrics.since("sign", t)
+    return str(extrinsic.data), f"0x{extrinsic.extrinsic_hash.hex()}"
+
+
+def _valid_until() -> int:
+    """Last block an extrinsic signed now can be included in."""
+    return (signer.block_number or config.current_block or 0) + config.ERA_PERIOD
+
+
+async def _submit(params: dict, xt_hex: str, xt_hash: str, context: SigningContext):
+    """Submit *xt_hex*, re-signing with a fresh nonce when the node rejects
+    ours as stale or from the future.  Returns the fan-out result, the hash
+    that was accepted, the last block it can land in and the future of its
+    inclusion."""
+    for attempt in range(config.NONCE_RETRIES + 1):
+        # Tracked before sending so the including block cannot slip past
+        valid_until = _valid_until()
+        included = inclusion.tracker.track(xt_hash, valid_until)
+        try:
+            fanout = await broadcast.submit(xt_hex, xt_hash)
+            return fanout, xt_hash, valid_until, included
+        except Exception as e:
+            inclusion.tracker.forget(xt_hash)
+            broadcast.forget(xt_hash)
+            # Whatever went wrong, the optimistic nonce may now be off
+            nonce = await context.resync_nonce()
+            if not is_nonce_error(e) or attempt == config.NONCE_RETRIES:
+                raise
+            config.logger.warning("[Nonce Error] %s; re-signing with nonce %s", e, nonce)
+            xt_hex, xt_hash = _sign_stake(params, context)
+
+
+def _record(order_id: int | None, **fields) -> None:
+    if order_id is not None:
+        orders.ledger.update(order_id, **fields)
+
+
+def _record_outcome(order_id: int | None, result: inclusion.Inclusion) -> tuple[bool, str]:
+    """Record the inclusion *result* on *order_id*; returns (success, message)."""
+    if result.success is False:
+        _record(order_id, status=orders.FAILED, block_hash=result.block_hash,
+                error=result.error)
+        return False, f"❌ Transaction failed: {result.error}"
+    msg = f"✅ Transaction successful: {result.xt_hash} in {result.block_hash}"
+    if result.success is None:
+        msg += " (events unavailable)"
+    _record(order_id, status=orders.INCLUDED, block_hash=result.block_hash)
+    return True, msg
+
+
+async def _track_inclusion(
+    netuid: int, params: dict, xt_hex: str, xt_hash: str, account: Account,
+    detected_at: float | None = None, order_id: int | None = None,
+) -> bool:
+    """Submit *xt_hex* to every endpoint and report its inclusion result.
+
+    All `RPC_ENDPOINTS` get the same bytes at the same time; the outcome comes
+    from `inclusion.tracker`, which reads each new block once for every order
+    in flight.
+    """
+    try:
+        fanout, xt_hash, valid_until, included = await _submit(
+            params, xt_hex, xt_hash, account.context
+        )
+        _record(order_id, status=orders.SUBMITTED, xt_hash=xt_hash, valid_until=valid_until)
+        if fanout.first is not None:
+            print(f"📡 {xt_hash} first acknowledged by {fanout.first}")
+        if detected_at is not None and fanout.acked_at is not None:
+            metrics.observe("detect_to_submit", fanout.acked_at - detected_at)
+        try:
+            result = await included
+        except asyncio.TimeoutError as e:
+            raise RuntimeError(f"extrinsic {e}") from None
+        broadcast.record_inclusion(fanout)
+        success, msg = _record_outcome(order_id, result)
+    except Exception as e:
+        success = False
+        msg = f"❌ Stake submission failed on subnet {netuid}: {e}"
+        config.logger.error(msg, exc_info=True)
+        _record(order_id, status=orders.FAILED, error=str(e))
+
+    signers.release(account, params["amount"])
+    broadcast.forget(xt_hash)
+    print(msg)
+    printTG(msg)
+    return success
+
+
+def _start_tracking(netuid: int, params: dict, xt_hex: str, xt_hash: str,
+                    account: Account, detected_at: float | None,
+                    order_id: int | None) -> None:
+    _record(order_id, limit_price=params["limit_price"], xt_hash=xt_hash)
+    task = asyncio.create_task(
+        _track_inclusion(netuid, params, xt_hex, xt_hash, account, detected_at, order_id)
+    )
+    _in_flight[xt_hash] = task
+    task.add_done_callback(lambda _: _in_flight.pop(xt_hash, None))
+
+
+async def add_stake(netuid: int, detected_at: float | None = None,
+                    order_id: int | None = None) -> str | None:
+    """Compose, sign and submit a stake on *netuid*.
+
+    Returns the extrinsic hash as soon as the extrinsic is handed off; inclusion
+    is tracked by a background task (see `in_flight`), so callers on the event
+    loop are never held for a block.  *detected_at* is the `perf_counter()` at
+    which the trigger reached us, for end-to-end latency.  With `STAKE_BOOK`
+    on, the stake pre-signed for this block is sent when it is still valid,
+    the primary account (which signs the book) is idle and can pay for it.
+    Live stakes are signed by an idle account from `signers`.  Progress is
+    recorded on ledger order *order_id* when given.
+    """
+    # Only waits for a trigger that arrives while startup is still syncing
+    await signers.wait_synced()
+    presigned = None
+    if config.STAKE_BOOK and signers.primary.in_flight == 0:
+        entry = book.peek(netuid)
+        if entry is not None and signers.primary.can_afford(entry.params["amount"]):
+            presigned = book.take(netuid)
+    if presigned is not None:
+        signers.hold(signers.primary, presigned.params["amount"])
+        _start_tracking(
+            netuid, presigned.params, presigned.xt_hex, presigned.xt_hash,
+            signers.primary, detected_at, order_id,
+        )
+        _record(order_id, amount=presigned.params["amount"])
+        message = (
+            f"Staking {presigned.params['amount']} on subnet {netuid} "
+            f"(pre-signed, limit {presigned.params['limit_price']})"
+        )
+        print(message)
+        printTG(message)
+        return presigned.xt_hash
+
+    t = time.perf_counter()
+    sized = sizing_table.get(netuid)
+    if sized is None:
+        # Cache miss or stale reading: pay the round trips
+        pool_alpha, pool_tao = await fetch_pool_reserves(netuid)
+        sized = size_one(netuid, config.current_block or 0, pool_tao, pool_alpha)
+    metrics.since("reserve_lookup", t)
+
+    if not sized.active:
+        if sized.amount < config.MIN_STAKE_AMOUNT:
+            msg = f"Pool too shallow for slippage on subnet {netuid}, not staking"
+        else:
+            msg = "Low alpha likely not active, not staking"
         print(msg)
         printTG(msg)
-        return False
+        _record(order_id, status=orders.SKIPPED, error=msg)
+        return None
 
-    price = _price_per_alpha(pool_tao, pool_alpha)
-    limit_price_nano = int(price * config.SLIPPAGE * config.NANO)
+    account = signers.acquire(sized.amount)
+    if account is None:
+        msg = f"No signing account can cover {sized.amount} on subnet {netuid}, not staking"
+        print(msg)
+        printTG(msg)
+        _record(order_id, status=orders.SKIPPED, error=msg)
+        return None
+
+    params = _stake_params(sized)
+    _record(order_id, price=f"{sized.spot:.10f}", amount=sized.amount)
 
     message = (
-        f"Staking {config.STAKE_AMOUNT} at {price:.10f} TAO/α on subnet {netuid}"
+        f"Staking {sized.amount} at {sized.spot:.10f} TAO/α on subnet {netuid} "
+        f"from {account.address} (impact {sized.impact:.2%}, ~{sized.alpha_out} α)"
     )
     print(message)
     printTG(message)
 
-    call = substrate.compose_call(
-        call_module="SubtensorModule",
-        call_function="add_stake",
-        call_params={
-            "validator_hotkey": config.VALIDATOR_HOTKEY,
-            "amount": config.STAKE_AMOUNT,
-            "limit_price": limit_price_nano,
-            "netuid": netuid,
-        },
-    )
+    try:
+        xt_hex, xt_hash = _sign_stake(params, account.context)
+    except Exception:
+        signers.release(account, sized.amount)
+        raise
+    _start_tracking(netuid, params, xt_hex, xt_hash, account, detected_at, order_id)
+    return xt_hash
 
-    extrinsic = substrate.create_signed_extrinsic(
-        call=call, keypair=keypair, tip=config.TIP_AMOUNT, era={"period": 1}
-    )
-    receipt = substrate.submit_extrinsic(extrinsic, wait_for_inclusion=True)
 
-    if receipt.is_success:
-        msg = (
-            f"✅ Transaction successful: {receipt.extrinsic_hash} in {receipt.block_hash}"
-        )
-    else:
-        msg = f"❌ Transaction failed: {receipt.error_message}"
+def in_flight() -> dict[str, asyncio.Task]:
+    """Snapshot of stakes submitted but not yet resolved, keyed by extrinsic hash."""
+    return dict(_in_flight)
 
-    print(msg)
-    printTG(msg)
-    return receipt.is_success
\ No newline at end of file
+
+async def recover_submitted() -> int:
+    """Settle orders a previous run submitted but never saw resolve; returns
+    how many were settled.
+
+    An extrinsic can only land between the block its order was claimed at and
+    its ``valid_until``, so only those blocks up to the head are read, each
+    once.  Orders whose window is still open are also handed to
+    `inclusion.tracker`, which settles them from the coming blocks.  Orders
+    whose blocks cannot be read stay submitted for the next run.
+    """
+    rows = orders.ledger.submitted()
+    if not rows:
+        return 0
+    header = await rpc.client.request("chain_getHeader")
+    head = int(header["number"], 16)
+
+    windows: dict[str, tuple[int, int]] = {}   # xt_hash -> (first, last) block
+    order_ids: dict[str, int] = {}
+    settled = 0
+    for row in rows:
+        if row["xt_hash"] is None or row["block"] is None:
+            _record(row["id"], status=orders.FAILED, error="outcome unknown after restart")
+            settled += 1
+            continue
+        # Orders submitted before valid_until was recorded: one era from the claim
+        last = row["valid_until"] or row["block"] + config.ERA_PERIOD
+        windows[row["xt_hash"]] = (row["block"] + 1, last)
+        order_ids[row["xt_hash"]] = row["id"]
+        if last > head:
+            # Registered before any await so no new head can slip past
+            included = inclusion.tracker.track(row["xt_hash"], last)
+            task = asyncio.create_task(_await_recovered(row["id"], included))
+            _in_flight[row["xt_hash"]] = task
+            task.add_done_callback(lambda _, h=row["xt_hash"]: _in_flight.pop(h, None))
+
+    blocks = sorted({
+        n for first, last in windows.values() for n in range(first, min(last, head) + 1)
+    })
+    unread: set[str] = set()
+    for block_num in blocks:
+        wanted = {
+            xt_hash for xt_hash, (first, last) in windows.items()
+            if first <= block_num <= last and xt_hash not in unread
+        }
+        if not wanted:
+            continue
+        try:
+            results = await inclusion.tracker.read_block(block_num, wanted)
+        except Exception as e:
+            config.logger.error("[Order Recovery Error] block %s: %s", block_num, e, exc_info=True)
+            unread |= wanted
+            continue
+        for result in results:
+            del windows[result.xt_hash]
+            inclusion.tracker.forget(result.xt_hash)
+            _, msg = _record_outcome(order_ids[result.xt_hash], result)
+            print(f"Recovered order {order_ids[result.xt_hash]}: {msg}")
+            settled += 1
+
+    for xt_hash, (_, last) in windows.items():
+        if last <= head and xt_hash not in unread:
+            _record(order_ids[xt_hash], status=orders.FAILED,
+                    error=f"extrinsic not included by block {last}")
+            settled += 1
+    return settled
+
+
+async def _await_recovered(order_id: int, included: asyncio.Future) -> None:
+    try:
+        result = await included
+    except asyncio.CancelledError:
+        return  # found in a block read by `recover_submitted`
+    except asyncio.TimeoutError as e:
+        _record(order_id, status=orders.FAILED, error=f"extrinsic {e}")
+        return
+    _, msg = _record_outcome(order_id, result)
+    print(f"Recovered order {order_id}: {msg}")
@@ -0,0 +1,102 @@
+"""Startup timing: phases, milestones and (optionally) per-import cost.
+
+`phase` times a step of `main.main`; `mark` records the first time a
+milestone is reached (``first_poll`` when the first pool read comes back,
+``first_head`` when the first block header arrives).  All times are measured
+from when this module was imported, which `main.py` does before anything else.
+
+``python main.py --profile-startup`` also calls `enable_import_timing` first
+thing, which wraps ``__import__`` to record how long every module took to
+import (inclusive of what it imports and exclusive of it), and prints `report`
+once the bot is polling and warm-up has finished.
+
+Only the standard library is imported here, so the timer sees every other
+import.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import builtins
+import contextlib
+import sys
+import time
+
+T0 = time.perf_counter()
+
+phases: list[tuple[str, float, float]] = []   # (name, start, seconds) since T0
+marks: dict[str, float] = {}                  # milestone -> seconds since T0
+imports: list[tuple[str, int, float, float]] = []  # (module, depth, inclusive, self)
+
+_waiters: dict[str, asyncio.Event] = {}
+_original_import = builtins.__import__
+_stack: list[float] = []  # time spent in child imports, per open import
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    start = time.perf_counter()
+    _stack.append(0.0)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        imports.append((name, len(_stack), elapsed, elapsed - children))
+
+
+def enable_import_timing() -> None:
+    builtins.__import__ = _timed_import
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, start - T0, time.perf_counter() - start))
+
+
+async def timed(name: str, awaitable):
+    """Await *awaitable* as phase *name*."""
+    with phase(name):
+        return await awaitable
+
+
+def mark(name: str) -> None:
+    """Record milestone *name* the first time it is reached."""
+    if name in marks:
+        return
+    marks[name] = time.perf_counter() - T0
+    waiter = _waiters.get(name)
+    if waiter is not None:
+        waiter.set()
+
+
+async def wait(name: str) -> float:
+    """Wait for milestone *name*; returns its time since start."""
+    if name not in marks:
+        await _waiters.setdefault(name, asyncio.Event()).wait()
+    return marks[name]
+
+
+def report(top: int = 15) -> str:
+    lines = ["Startup profile (ms since main.py started)", "", "Phases:"]
+    for name, start, seconds in sorted(phases, key=lambda p: p[1]):
+        lines.append(f"  {name:<24} at {start * 1000:8.1f}  took {seconds * 1000:8.1f}")
+    lines += ["", "Milestones:"]
+    for name, at in sorted(marks.items(), key=lambda m: m[1]):
+        lines.append(f"  {name:<24} at {at * 1000:8.1f}")
+    if imports:
+        lines += ["", f"Imports from main.py (inclusive, top {top}):"]
+        direct = sorted((i for i in imports if i[1] == 0), key=lambda i: -i[2])
+        for name, _, inclusive, _ in direct[:top]:
+            lines.append(f"  {name:<40} {inclusive * 1000:8.1f}")
+        lines += ["", f"Slowest modules (self time, top {top}):"]
+        for name, _, _, own in sorted(imports, key=lambda i: -i[3])[:top]:
+            lines.append(f"  {name:<40} {own * 1000:8.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,92 @@
+"""Raw storage reads over the shared RPC client.
+
+Storage keys are built locally (twox128 pallet/item prefix + hashed map key)
+and values come back as SCALE hex, so bulk reads of small maps such as
+`SubnetTAO` cost a key listing and one `state_queryStorageAt` instead of one
+query per entry.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+import xxhash
+
+import config
+import rpc
+
+MAX_KEYS_PER_PAGE = 1000  # node-side limit of state_getKeysPaged
+
+
+def twox64(data: bytes) -> bytes:
+    return xxhash.xxh64(data, seed=0).intdigest().to_bytes(8, "little")
+
+
+def twox128(data: bytes) -> bytes:
+    return twox64(data) + xxhash.xxh64(data, seed=1).intdigest().to_bytes(8, "little")
+
+
+HASHERS = {
+    "Identity": lambda key: key,
+    "Twox64Concat": lambda key: twox64(key) + key,
+    "Blake2_128Concat": lambda key: hashlib.blake2b(key, digest_size=16).digest() + key,
+}
+
+
+def storage_prefix(pallet: str, item: str) -> str:
+    return "0x" + (twox128(pallet.encode()) + twox128(item.encode())).hex()
+
+
+def map_key(pallet: str, item: str, key: bytes, hasher: str) -> str:
+    return storage_prefix(pallet, item) + HASHERS[hasher](key).hex()
+
+
+def netuid_key(netuid: int) -> bytes:
+    return netuid.to_bytes(2, "little")
+
+
+def netuid_of(storage_key: str) -> int:
+    """Netuid of a ``u16``-keyed map entry.  Both `Identity` and the ``*Concat``
+    hashers end with the raw key, so this does not depend on the hasher."""
+    return int.from_bytes(bytes.fromhex(storage_key[-4:]), "little")
+
+
+def decode_int(value: str | None) -> int:
+    """Little-endian unsigned integer from SCALE hex (missing value -> 0)."""
+    if not value:
+        return 0
+    return int.from_bytes(bytes.fromhex(value[2:]), "little")
+
+
+async def read_values(keys: list[str], at: str | None = None,
+                      client: rpc.RpcClient | None = None) -> dict[str, str | None]:
+    """Read *keys* at block *at* in one `state_queryStorageAt` round trip."""
+    client = client or rpc.client
+    values: dict[str, str | None] = dict.fromkeys(keys)
+    if not keys:
+        return values
+    result = await client.request("state_queryStorageAt", [keys, at])
+    for change_set in result or []:
+        for key, value in change_set["changes"]:
+            values[key] = value
+    return values
+
+
+async def read_map(pallet: str, item: str, at: str | None = None,
+                   client: rpc.RpcClient | None = None) -> dict[str, str | None]:
+    """Read every entry of the storage map *pallet.item* at block *at*."""
+    client = client or rpc.client
+    prefix = storage_prefix(pallet, item)
+    page = min(config.RESERVE_PAGE_SIZE, MAX_KEYS_PER_PAGE)
+    keys: list[str] = []
+    start = None
+    while True:
+        batch = await client.request("state_getKeysPaged", [prefix, page, start, at])
+        keys.extend(batch)
+        if len(batch) < page:
+            break
+        start = batch[-1]
+    values: dict[str, str | None] = {}
+    for i in range(0, len(keys), MAX_KEYS_PER_PAGE):
+        values.update(await read_values(keys[i : i + MAX_KEYS_PER_PAGE], at, client))
+    return values
@@ -1,9 +1,24 @@
-from substrateinterface import SubstrateInterface, Keypair
-import bittensor
+"""Signing keypairs for `config.MNEMONICS`.
+
+Derived on first use: importing substrateinterface and deriving the sr25519
+keys is a noticeable share of a cold start, and nothing needs them before the
+first stake (`SignerPool.load_keys` derives them off the event loop while
+startup talks to the node).
+"""
+
 import config
 
-keypair = Keypair.create_from_mnemonic(config.MNEMONIC)
-substrate = SubstrateInterface(url=config.WS_URL)
-metadata = substrate.get_metadata()
-subtensor = bittensor.subtensor(network=config.WS_URL)
+_keypairs: list | None = None
+
+
+def keypairs() -> list:
+    global _keypairs
+    if _keypairs is None:
+        from substrateinterface import Keypair
+
+        _keypairs = [Keypair.create_from_mnemonic(mnemonic) for mnemonic in config.MNEMONICS]
+    return _keypairs
+
 
+def keypair():
+    return keypairs()[0]
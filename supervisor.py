@@ -0,0 +1,144 @@
+"""Hot-standby read connections with latency probing and instant failover.
+
+Every node in ``READ_ENDPOINTS`` is kept connected (the same per-node clients
+`broadcast` fans submissions out over).  Every ``PROBE_INTERVAL`` each one is
+asked for its best header, which gives its RPC round-trip time and how many
+blocks it trails the best node by.  When the node behind `rpc.client` drops,
+stops answering within ``PROBE_TIMEOUT`` or falls more than ``MAX_HEAD_LAG``
+blocks behind, `rpc.client` is pointed at the healthiest standby and the old
+client is detached: the block, pool and upgrade watchers see a
+`ConnectionError` and re-subscribe on the new node in one round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+import config
+import metrics
+import rpc
+from telegram import printTG
+
+
+@dataclass(slots=True)
+class NodeHealth:
+    url: str
+    ok: bool = False             # answered the last probe in time
+    head: int | None = None
+    rtt_ms: float | None = None
+    failures: int = 0            # probes failed in a row
+
+
+class Supervisor:
+    def __init__(self, urls: list[str]) -> None:
+        self.urls = urls
+        self.health = {url: NodeHealth(url) for url in urls}
+        self.failovers = 0
+
+    @property
+    def active(self) -> str:
+        return rpc.client.url
+
+    def lag(self, url: str) -> int | None:
+        """Blocks *url* trails the most advanced healthy node by."""
+        heads = [h.head for h in self.health.values() if h.ok and h.head is not None]
+        head = self.health[url].head
+        if not heads or head is None:
+            return None
+        return max(heads) - head
+
+    def _healthy(self, url: str) -> bool:
+        lag = self.lag(url)
+        return (
+            self.health[url].ok
+            and rpc.get(url).connected
+            and lag is not None
+            and lag <= config.MAX_HEAD_LAG
+        )
+
+    def best(self) -> str | None:
+        """The healthy node with the freshest head, fastest first."""
+        healthy = [url for url in self.urls if self._healthy(url)]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda url: (self.lag(url), self.health[url].rtt_ms))
+
+    async def _probe(self, url: str) -> None:
+        client, health = rpc.get(url), self.health[url]
+        if not client.connected:
+            health.ok = False
+            return
+        start = time.perf_counter()
+        try:
+            header = await client.request("chain_getHeader", timeout=config.PROBE_TIMEOUT)
+        except Exception as e:
+            health.ok = False
+            health.failures += 1
+            if health.failures == 1:
+                config.logger.warning("[Probe Failed] %s: %s", url, e)
+            return
+        health.rtt_ms = (time.perf_counter() - start) * 1000
+        health.head = int(header["number"], 16)
+        health.ok = True
+        health.failures = 0
+
+    def check(self) -> None:
+        """Fail over when the active node is unhealthy and a standby is not."""
+        active = self.active
+        if active in self.health and self._healthy(active):
+            return
+        target = self.best()
+        if target is None or target == active:
+            return
+        health = self.health.get(active)
+        if not rpc.client.connected:
+            reason = "disconnected"
+        elif health is None or not health.ok:
+            reason = "not answering"
+        else:
+            reason = f"{self.lag(active)} blocks behind"
+        self.switch(target, reason)
+
+    def switch(self, url: str, reason: str) -> None:
+        old, rpc.client = rpc.client, rpc.get(url)
+        old.detach()
+        self.failovers += 1
+        health = self.health[url]
+        msg = (
+            f"[Read Failover] {old.url} {reason}; now reading from {url} "
+            f"(head {health.head}, {health.rtt_ms:.0f} ms)"
+        )
+        config.logger.warning(msg)
+        printTG(msg)
+
+    def _on_disconnect(self, client: rpc.RpcClient) -> None:
+        self.health[client.url].ok = False
+        if client is rpc.client:
+            self.check()  # don't wait for the next probe
+
+    async def run(self) -> None:
+        """Connect the standbys and probe every node until cancelled."""
+        if len(self.urls) < 2:
+            return
+        for url in self.urls:
+            client = rpc.get(url)
+            client.on_disconnect(self._on_disconnect)
+            # Connect in the background; a dead standby must not hold the rest
+            asyncio.create_task(client.start())
+        while True:
+            try:
+                await asyncio.gather(*(self._probe(url) for url in self.urls))
+                self.check()
+            except Exception as e:
+                config.logger.error("[Supervisor Error] %s", e, exc_info=True)
+            await asyncio.sleep(config.PROBE_INTERVAL)
+
+
+supervisor = Supervisor(config.READ_ENDPOINTS)
+metrics.register_gauge("read_failovers", lambda: supervisor.failovers)
+metrics.register_gauge("active_node_lag_blocks", lambda: supervisor.lag(supervisor.active) or 0)
+metrics.register_gauge(
+    "active_node_rtt_ms", lambda: supervisor.health[supervisor.active].rtt_ms or 0
+)
@@ -1,26 +1,141 @@
-"""Thin wrapper around Telegram Bot API with proper error handling."""
+"""Non-blocking wrapper around the Telegram Bot API.
+
+`printTG` only appends to a bounded in-memory queue and returns; a single
+background sender (`run_sender`) drains it over one reused HTTP session,
+coalescing bursts (e.g. reconnect storms) into as few messages as possible and
+pacing itself to Telegram's per-chat rate limit.  Errors are logged, never
+raised.  aiohttp is imported in a worker thread once there is something to
+send, keeping its import off startup and off the event loop.
+"""
 
 from __future__ import annotations
 
-import requests
-from requests import RequestException
+import asyncio
+import importlib
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
 import config
 
+if TYPE_CHECKING:
+    import aiohttp
+
+MAX_MESSAGE_LEN = 4096     # Telegram hard limit per message
+MIN_SEND_INTERVAL = 1.0    # seconds; Telegram allows ~1 message/s per chat
+MAX_RETRIES = 3
+
+_queue: deque[str] = deque(maxlen=config.TG_QUEUE_SIZE)
+_dropped = 0
+_wakeup: asyncio.Event | None = None
+_next_send_at = 0.0
+
 
 def printTG(message: str) -> None:
-    """Send *message* to the configured chat.
-
-    Errors are logged but not raised.
-    """
-    try:
-        resp = requests.post(
-            config.TELEGRAM_URL,
-            data={"chat_id": config.TG_CHAT_ID, "text": message},
-            timeout=10,
-        )
-        if resp.status_code != 200:
-            config.logger.warning(
-                "[Telegram HTTP %s] %s", resp.status_code, resp.text
-            )
-    except RequestException as exc:
-        config.logger.error("[Telegram Error] %s", exc, exc_info=True)
\ No newline at end of file
+    """Queue *message* for the configured chat (oldest is dropped when full)."""
+    global _dropped
+    if len(_queue) == _queue.maxlen:
+        _dropped += 1
+    _queue.append(message)
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _drain() -> list[str]:
+    global _dropped
+    batch = list(_queue)
+    _queue.clear()
+    if _dropped:
+        batch.insert(0, f"({_dropped} notifications dropped)")
+        _dropped = 0
+    return batch
+
+
+def _coalesce(messages: list[str]) -> list[str]:
+    """Collapse repeats and pack *messages* into as few Telegram messages as fit."""
+    counts: dict[str, int] = {}
+    for msg in messages:
+        counts[msg] = counts.get(msg, 0) + 1
+    lines = [msg if n == 1 else f"{msg} (x{n})" for msg, n in counts.items()]
+
+    chunks: list[str] = []
+    current = ""
+    for line in lines:
+        line = line[:MAX_MESSAGE_LEN]
+        if current and len(current) + 2 + len(line) > MAX_MESSAGE_LEN:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _load_aiohttp():
+    return await asyncio.to_thread(importlib.import_module, "aiohttp")
+
+
+async def _send(session: aiohttp.ClientSession, text: str) -> None:
+    import aiohttp  # already loaded by whoever opened *session*
+
+    global _next_send_at
+    for _ in range(MAX_RETRIES):
+        delay = _next_send_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _next_send_at = time.monotonic() + MIN_SEND_INTERVAL
+        try:
+            async with session.post(
+                config.TELEGRAM_URL,
+                data={"chat_id": config.TG_CHAT_ID, "text": text},
+            ) as resp:
+                if resp.status == 200:
+                    return
+                body = await resp.text()
+                if resp.status == 429:
+                    # Telegram tells us exactly how long to back off
+                    try:
+                        retry_after = (await resp.json())["parameters"]["retry_after"]
+                    except Exception:
+                        retry_after = 5
+                    _next_send_at = time.monotonic() + retry_after
+                    continue
+                config.logger.warning("[Telegram HTTP %s] %s", resp.status, body)
+                return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            config.logger.error("[Telegram Error] %s", exc, exc_info=True)
+            return
+    config.logger.warning("[Telegram] giving up after %s rate-limited attempts", MAX_RETRIES)
+
+
+async def _send_batch(session: aiohttp.ClientSession) -> None:
+    for text in _coalesce(_drain()):
+        await _send(session, text)
+
+
+async def run_sender() -> None:
+    """Background task: deliver queued notifications until cancelled."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    if not _queue:
+        await _wakeup.wait()
+    aiohttp = await _load_aiohttp()
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        while True:
+            _wakeup.clear()
+            if not _queue:
+                await _wakeup.wait()
+            # Give a burst a moment to accumulate so it goes out as one message
+            await asyncio.sleep(config.TG_BATCH_WINDOW)
+            await _send_batch(session)
+
+
+async def flush() -> None:
+    """Deliver everything queued so far (for scripts that exit right after)."""
+    if not _queue:
+        return
+    aiohttp = await _load_aiohttp()
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        await _send_batch(session)
@@ -1,6 +1,25 @@
-from staking import add_stake
+import asyncio
 
+import rpc
+import runtime
+import telegram
+from listener import watch_new_blocks
+from staking import add_stake, in_flight, signers
 
-print("adding stake")
-add_stake(1)
-print("done")
+
+async def main():
+    await rpc.client.start()
+    await runtime.load()
+    await signers.sync()
+    # Inclusion is resolved from the block stream
+    blocks = asyncio.create_task(watch_new_blocks())
+    print("adding stake")
+    xt_hash = await add_stake(1)
+    if xt_hash is not None:
+        await in_flight()[xt_hash]
+    blocks.cancel()
+    print("done")
+    await telegram.flush()
+
+
+asyncio.run(main())
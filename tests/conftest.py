@@ -0,0 +1,156 @@
+"""Shared fixtures: a minimal but real V14 runtime, built without a node.
+
+The metadata declares just what the bot reads from a pending extrinsic: the
+``MultiAddress``/``MultiSignature`` extrinsic header, a ``CheckNonce`` signed
+extension and ``SubtensorModule.schedule_swap_coldkey``.  Extrinsics are
+encoded against it with scalecodec; nothing on the read side checks the
+signature, so it only has to be well formed.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+# config refuses to import without these; no test talks to Telegram or a node
+os.environ.setdefault("TG_BOT_TOKEN", "test")
+os.environ.setdefault("TG_CHAT_ID", "1")
+os.environ.setdefault("WS_URL", "ws://127.0.0.1:1")
+os.environ.setdefault(
+    "MNEMONIC", "bottom drive obey lake curtain smoke basket hold race lonely fit walk"
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+SUBTENSOR_PALLET_INDEX = 7
+SCHEDULE_SWAP_COLDKEY_INDEX = 73
+
+
+def _type(path, definition, params=()):
+    return {
+        "path": list(path),
+        "params": [{"name": name, "type": ty} for name, ty in params],
+        "def": definition,
+        "docs": [],
+    }
+
+
+def _field(ty, name=None, type_name=None):
+    return {"name": name, "type": ty, "typeName": type_name, "docs": []}
+
+
+def _variant(name, index, fields=()):
+    return {"name": name, "fields": list(fields), "index": index, "docs": []}
+
+
+# Portable registry; a type's id is its position in the list
+_TYPES = [
+    _type((), {"primitive": "u8"}),                                          # 0
+    _type((), {"array": {"len": 32, "type": 0}}),                            # 1
+    _type(("sp_core", "crypto", "AccountId32"),                              # 2
+          {"composite": {"fields": [_field(1, type_name="[u8; 32]")]}}),
+    _type((), {"primitive": "u32"}),                                         # 3
+    _type((), {"compact": {"type": 3}}),                                     # 4
+    _type((), {"tuple": []}),                                                # 5
+    _type((), {"sequence": {"type": 0}}),                                    # 6
+    _type(("sp_runtime", "multiaddress", "MultiAddress"),                    # 7
+          {"variant": {"variants": [
+              _variant("Id", 0, [_field(2, type_name="AccountId")]),
+              _variant("Index", 1, [_field(4, type_name="AccountIndex")]),
+              _variant("Raw", 2, [_field(6)]),
+              _variant("Address32", 3, [_field(1)]),
+          ]}},
+          params=(("AccountId", 2), ("AccountIndex", 5))),
+    _type((), {"array": {"len": 64, "type": 0}}),                            # 8
+    _type(("sp_core", "sr25519", "Signature"),                               # 9
+          {"composite": {"fields": [_field(8)]}}),
+    _type((), {"array": {"len": 65, "type": 0}}),                            # 10
+    _type(("sp_runtime", "MultiSignature"),                                  # 11
+          {"variant": {"variants": [
+              _variant("Ed25519", 0, [_field(8)]),
+              _variant("Sr25519", 1, [_field(9)]),
+              _variant("Ecdsa", 2, [_field(10)]),
+          ]}}),
+    _type(("pallet_subtensor", "pallet", "Call"),                            # 12
+          {"variant": {"variants": [
+              _variant("schedule_swap_coldkey", SCHEDULE_SWAP_COLDKEY_INDEX,
+                       [_field(2, "new_coldkey", "T::AccountId")]),
+          ]}}),
+    _type(("node_subtensor_runtime", "RuntimeCall"),                         # 13
+          {"variant": {"variants": [
+              _variant("SubtensorModule", SUBTENSOR_PALLET_INDEX, [_field(12)]),
+          ]}}),
+    _type(("frame_system", "extensions", "check_nonce", "CheckNonce"),       # 14
+          {"composite": {"fields": [_field(4)]}}),
+    _type((), {"tuple": [14]}),                                              # 15
+    _type(("primitive_types", "H256"),                                       # 16
+          {"composite": {"fields": [_field(1)]}}),
+    _type(("sp_runtime", "generic", "unchecked_extrinsic", "UncheckedExtrinsic"),  # 17
+          {"composite": {"fields": [_field(6)]}},
+          params=(("Address", 7), ("Call", 13), ("Signature", 11), ("Extra", 15))),
+]
+
+
+def build_metadata_hex() -> str:
+    from scalecodec.base import RuntimeConfigurationObject
+    from scalecodec.type_registry import load_type_registry_preset
+
+    runtime_config = RuntimeConfigurationObject(implements_scale_info=True)
+    runtime_config.update_type_registry(load_type_registry_preset(name="core"))
+    metadata = runtime_config.create_scale_object("MetadataVersioned")
+    data = metadata.encode([
+        "0x6d657461",  # "meta"
+        {"V14": {
+            "types": {"types": [{"id": i, "type": ty} for i, ty in enumerate(_TYPES)]},
+            "pallets": [{
+                "name": "SubtensorModule", "storage": None, "calls": {"ty": 12},
+                "event": None, "constants": [], "error": None,
+                "index": SUBTENSOR_PALLET_INDEX,
+            }],
+            "extrinsic": {"ty": 17, "version": 4, "signed_extensions": [
+                {"identifier": "CheckSpecVersion", "ty": 5, "additional_signed": 3},
+                {"identifier": "CheckTxVersion", "ty": 5, "additional_signed": 3},
+                {"identifier": "CheckGenesis", "ty": 5, "additional_signed": 16},
+                {"identifier": "CheckNonce", "ty": 14, "additional_signed": 5},
+            ]},
+            "runtime_type": 13,
+        }},
+    ])
+    return str(data)
+
+
+@pytest.fixture(scope="session")
+def metadata_hex() -> str:
+    return build_metadata_hex()
+
+
+@pytest.fixture(scope="session")
+def rt(metadata_hex):
+    import runtime
+
+    return runtime.Runtime("node-subtensor", 1, 1, metadata_hex)
+
+
+@pytest.fixture(scope="session")
+def sign_call(rt):
+    """``sign_call(keypair, module, function, params)`` -> signed extrinsic hex."""
+
+    def sign(keypair, module: str, function: str, params: dict) -> str:
+        call = rt.runtime_config.create_scale_object("Call", metadata=rt.metadata)
+        call.encode({"call_module": module, "call_function": function, "call_args": params})
+        extrinsic = rt.runtime_config.create_scale_object("Extrinsic", metadata=rt.metadata)
+        extrinsic.encode({
+            "account_id": f"0x{keypair.public_key.hex()}",
+            "signature_version": keypair.crypto_type,
+            "signature": f"0x{keypair.sign(bytes(call.data.data)).hex()}",
+            "call_function": function,
+            "call_module": module,
+            "call_args": params,
+            "nonce": 0,
+            "era": "00",
+            "tip": 0,
+        })
+        return str(extrinsic.data)
+
+    return sign
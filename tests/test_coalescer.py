@@ -0,0 +1,51 @@
+"""Background jobs coalesced to the newest request."""
+
+from __future__ import annotations
+
+import asyncio
+
+from coalescer import Coalescer
+
+
+def test_requests_made_during_a_run_collapse_to_the_newest():
+    ran = []
+    release = asyncio.Event()
+
+    async def job(block: int) -> None:
+        ran.append(block)
+        if block == 1:
+            await release.wait()
+
+    async def main() -> None:
+        jobs = Coalescer("Test", job)
+        jobs.schedule(1)
+        await asyncio.sleep(0)
+        jobs.schedule(2)
+        jobs.schedule(3)
+        release.set()
+        await jobs._task
+
+    asyncio.run(main())
+    assert ran == [1, 3]
+
+
+def test_a_failing_run_does_not_stop_the_next():
+    ran = []
+
+    async def job(block: int) -> None:
+        ran.append(block)
+        if block == 1:
+            raise RuntimeError("node gone")
+
+    async def main() -> None:
+        jobs = Coalescer("Test", job)
+        jobs.schedule(1)
+        jobs.schedule(2)  # replaces 1 before it starts
+        await jobs._task
+        jobs.schedule(1)
+        await jobs._task
+        jobs.schedule(3)
+        await jobs._task
+
+    asyncio.run(main())
+    assert ran == [2, 1, 3]
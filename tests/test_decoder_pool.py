@@ -0,0 +1,32 @@
+"""The decoder pool warms its workers up front and decodes like inline."""
+
+from __future__ import annotations
+
+import asyncio
+
+from substrateinterface import Keypair
+
+import config
+from decoder_pool import DecoderPool
+
+
+def test_pool_is_ready_once_started_and_decodes_like_inline(rt, metadata_hex, sign_call):
+    keypair = Keypair.create_from_uri("//Alice")
+    hexes = [
+        sign_call(keypair, "SubtensorModule", "schedule_swap_coldkey",
+                  {"new_coldkey": Keypair.create_from_uri(f"//Key{i}").ss58_address})
+        for i in range(3)
+    ]
+    target = rt.call_index("SubtensorModule", "schedule_swap_coldkey")
+
+    async def run():
+        pool = DecoderPool(1, metadata_hex, config.SS58_FORMAT, rt.extra_layout, [target])
+        try:
+            assert not pool.ready
+            await pool.start()
+            assert pool.ready
+            return await pool.decode(hexes)
+        finally:
+            pool.shutdown()
+
+    assert asyncio.run(run()) == [rt.decode(hx) for hx in hexes]
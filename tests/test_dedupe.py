@@ -0,0 +1,54 @@
+"""Expiry and eviction of the pending-extrinsic dedupe cache."""
+
+from __future__ import annotations
+
+from dedupe import SeenCache
+
+TTL = 5
+
+
+def test_entry_expires_ttl_blocks_after_last_sighting():
+    cache = SeenCache(TTL, 100)
+    assert cache.add(b"a", 100)
+    assert not cache.add(b"a", 103)  # seen again: lives until 108
+    cache.expire(107)
+    assert b"a" in cache
+    cache.expire(108)
+    assert b"a" not in cache
+
+
+def test_entries_seen_before_the_first_head_count_from_it():
+    cache = SeenCache(TTL, 100)
+    cache.add(b"early", None)
+    cache.expire(5_000_000)  # first head
+    assert b"early" in cache
+    assert not cache.add(b"early", 5_000_001)
+    cache.expire(5_000_000 + TTL + 1)
+    assert b"early" not in cache
+
+
+def test_unstamped_entries_stay_ahead_of_later_ones():
+    cache = SeenCache(TTL, 100)
+    cache.add(b"early", None)
+    cache.expire(200)
+    cache.add(b"late", 201)
+    cache.expire(200 + TTL)
+    assert b"early" not in cache
+    assert b"late" in cache
+
+
+def test_least_recently_seen_is_evicted_first():
+    cache = SeenCache(TTL, 2)
+    cache.add(b"a", 1)
+    cache.add(b"b", 1)
+    cache.add(b"a", 2)
+    cache.add(b"c", 2)
+    assert b"b" not in cache
+    assert b"a" in cache and b"c" in cache
+
+
+def test_discard_forgets_a_key():
+    cache = SeenCache(TTL, 10)
+    cache.add(b"a", 1)
+    cache.discard(b"a")
+    assert cache.add(b"a", 1)
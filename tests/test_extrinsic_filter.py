@@ -0,0 +1,134 @@
+"""Call-index peek on raw extrinsic bytes."""
+
+from __future__ import annotations
+
+import pytest
+from substrateinterface import Keypair
+
+from conftest import SCHEDULE_SWAP_COLDKEY_INDEX, SUBTENSOR_PALLET_INDEX
+from extrinsic_filter import extra_layout, hex_to_bytes, peek_call_index
+
+# Subtensor's signed extensions, in runtime order
+SUBTENSOR_EXTENSIONS = (
+    "CheckNonZeroSender", "CheckSpecVersion", "CheckTxVersion", "CheckGenesis",
+    "CheckMortality", "CheckNonce", "CheckWeight", "ChargeTransactionPayment",
+    "SubtensorSignedExtension", "CheckMetadataHash",
+)
+LAYOUT = ("era", "compact", "compact", "u8")
+CALL = bytes([SUBTENSOR_PALLET_INDEX, SCHEDULE_SWAP_COLDKEY_INDEX])
+
+ID = b"\x00" + bytes(range(32))
+SR25519 = b"\x01" + b"\x5a" * 64
+IMMORTAL = b"\x00"
+MORTAL = b"\xa5\x03"  # period 64, phase 58
+
+
+def compact(n: int) -> bytes:
+    if n < 1 << 6:
+        return bytes([n << 2])
+    if n < 1 << 14:
+        return ((n << 2) | 1).to_bytes(2, "little")
+    if n < 1 << 30:
+        return ((n << 2) | 2).to_bytes(4, "little")
+    body = n.to_bytes((n.bit_length() + 7) // 8, "little")
+    return bytes([(len(body) - 4) << 2 | 3]) + body
+
+
+def signed(address=ID, signature=SR25519, era=IMMORTAL, nonce=0, tip=0, call=CALL) -> bytes:
+    body = (b"\x84" + address + signature + era + compact(nonce) + compact(tip)
+            + b"\x00" + call + b"\x00" * 32)
+    return compact(len(body)) + body
+
+
+def test_extra_layout():
+    assert extra_layout(SUBTENSOR_EXTENSIONS) == LAYOUT
+    assert extra_layout(("CheckEra", "CheckNonce")) == ("era", "compact")
+    assert extra_layout(SUBTENSOR_EXTENSIONS + ("SomeNewExtension",)) is None
+
+
+@pytest.mark.parametrize(
+    "address",
+    [ID, b"\x03" + b"\x11" * 32, b"\x04" + b"\x22" * 20],
+    ids=["Id", "Address32", "Address20"],
+)
+def test_fixed_size_addresses(address):
+    assert peek_call_index(signed(address=address), LAYOUT) == CALL
+
+
+@pytest.mark.parametrize(
+    "address",
+    [b"\x01" + compact(70_000), b"\x02" + compact(3) + b"abc", b"\x05" + b"\x00" * 32],
+    ids=["Index", "Raw", "unknown"],
+)
+def test_variable_or_unknown_addresses_cannot_tell(address):
+    assert peek_call_index(signed(address=address), LAYOUT) is None
+
+
+@pytest.mark.parametrize(
+    "signature",
+    [b"\x00" + b"\x01" * 64, SR25519, b"\x02" + b"\x03" * 65],
+    ids=["Ed25519", "Sr25519", "Ecdsa"],
+)
+def test_signatures(signature):
+    assert peek_call_index(signed(signature=signature), LAYOUT) == CALL
+
+
+def test_unknown_signature_cannot_tell():
+    assert peek_call_index(signed(signature=b"\x03" + b"\x00" * 64), LAYOUT) is None
+
+
+@pytest.mark.parametrize("era", [IMMORTAL, MORTAL], ids=["immortal", "mortal"])
+def test_eras(era):
+    assert peek_call_index(signed(era=era), LAYOUT) == CALL
+
+
+@pytest.mark.parametrize(
+    "value",
+    [0, 63, 64, (1 << 14) - 1, 1 << 14, (1 << 30) - 1, 1 << 30, 1 << 40, (1 << 64) - 1],
+)
+def test_compact_widths(value):
+    assert peek_call_index(signed(nonce=value), LAYOUT) == CALL
+    assert peek_call_index(signed(tip=value), LAYOUT) == CALL
+
+
+def test_long_extrinsic_length_prefix():
+    raw = signed(call=CALL + b"\x00" * 20_000)
+    assert raw[0] & 0b11 == 2  # four-byte length prefix
+    assert peek_call_index(raw, LAYOUT) == CALL
+
+
+def test_unsigned():
+    raw = compact(3) + b"\x04" + CALL
+    assert peek_call_index(raw, LAYOUT) == CALL
+    # The layout only describes the signed header
+    assert peek_call_index(raw, None) == CALL
+
+
+def test_signed_without_layout_cannot_tell():
+    assert peek_call_index(signed(), None) is None
+
+
+@pytest.mark.parametrize("version", [0x85, 0x05, 0x03])
+def test_other_versions_cannot_tell(version):
+    raw = bytearray(signed())
+    raw[raw.index(0x84)] = version
+    assert peek_call_index(bytes(raw), LAYOUT) is None
+
+
+@pytest.mark.parametrize("era", [IMMORTAL, MORTAL], ids=["immortal", "mortal"])
+def test_truncated_before_the_call_index(era):
+    raw = signed(era=era, nonce=1 << 30, tip=1 << 14)
+    call_at = raw.index(CALL, 2 + 1 + 33 + 65)
+    for end in range(call_at + 2):
+        assert peek_call_index(raw[:end], LAYOUT) is None
+
+
+def test_matches_scalecodec_encoding(rt, sign_call):
+    hx = sign_call(
+        Keypair.create_from_uri("//Alice"), "SubtensorModule", "schedule_swap_coldkey",
+        {"new_coldkey": Keypair.create_from_uri("//Bob").ss58_address},
+    )
+    assert rt.extra_layout == ("compact",)
+    assert peek_call_index(hex_to_bytes(hx), rt.extra_layout) == rt.call_index(
+        "SubtensorModule", "schedule_swap_coldkey"
+    )
@@ -0,0 +1,140 @@
+"""Order ledger: claims, exposure and settling orders after a restart."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import config
+import inclusion
+import orders
+import rpc
+import staking
+from inclusion import Inclusion
+from orders import OrderLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = OrderLedger(str(tmp_path / "orders.sqlite3"))
+    yield ledger
+    ledger.close()
+
+
+def test_claim_is_once_per_trigger_and_subnet(ledger, tmp_path):
+    first = ledger.claim("0xaa", 1, block=100, amount=5)
+    assert first is not None
+    assert ledger.claim("0xaa", 1, block=101, amount=7) is None
+    assert ledger.get(first)["amount"] == 5  # the repeat changed nothing
+
+    assert ledger.claim("0xaa", 2) not in (None, first)
+    assert ledger.claim("0xbb", 1) is not None
+
+    # The claim is durable: a restarted bot sees the trigger as handled
+    ledger.close()
+    assert OrderLedger(str(tmp_path / "orders.sqlite3")).claim("0xaa", 1) is None
+
+
+def test_exposure_counts_open_orders_only(ledger):
+    assert ledger.exposure() == 0
+    pending = ledger.claim("0x01", 1, amount=10)
+    submitted = ledger.claim("0x02", 1, amount=20)
+    included = ledger.claim("0x03", 1, amount=40)
+    failed = ledger.claim("0x04", 1, amount=80)
+    ledger.claim("0x05", 1)  # no amount yet
+    ledger.update(submitted, status=orders.SUBMITTED, xt_hash="0x2222")
+    ledger.update(included, status=orders.INCLUDED)
+    ledger.update(failed, status=orders.FAILED, error="boom")
+
+    assert ledger.exposure() == 30
+    assert [row["id"] for row in ledger.open_orders()][:2] == [pending, submitted]
+    ledger.update(pending, status=orders.SKIPPED)
+    assert ledger.exposure() == 20
+
+
+def test_update_rejects_unknown_fields(ledger):
+    order_id = ledger.claim("0x01", 1)
+    with pytest.raises(ValueError):
+        ledger.update(order_id, trigger_hash="0x02")
+
+
+def test_recover_abandons_unsubmitted_orders(ledger):
+    pending = ledger.claim("0x01", 1, amount=10)
+    submitted = ledger.claim("0x02", 1, amount=20)
+    ledger.update(submitted, status=orders.SUBMITTED, xt_hash="0x2222")
+
+    assert ledger.recover() == 1
+    assert ledger.get(pending)["status"] == orders.ABANDONED
+    assert ledger.get(submitted)["status"] == orders.SUBMITTED
+    assert ledger.exposure() == 20
+    assert ledger.recover() == 0
+
+
+class _Node:
+    def __init__(self, head: int) -> None:
+        self.head = head
+
+    async def request(self, method, params=None, timeout=None):
+        assert method == "chain_getHeader"
+        return {"number": hex(self.head)}
+
+
+def test_recover_submitted_settles_from_the_chain(ledger, monkeypatch):
+    head = 120
+    monkeypatch.setattr(orders, "ledger", ledger)
+    monkeypatch.setattr(rpc, "client", _Node(head))
+
+    def submitted(trigger: str, xt_hash: str | None, block: int | None,
+                  valid_until: int | None) -> int:
+        order_id = ledger.claim(trigger, 1, block=block, amount=1)
+        ledger.update(order_id, status=orders.SUBMITTED, xt_hash=xt_hash,
+                      valid_until=valid_until)
+        return order_id
+
+    landed = submitted("0x01", "0xa1", 100, 110)
+    reverted = submitted("0x02", "0xa2", 100, 110)
+    expired = submitted("0x03", "0xa3", 100, 110)
+    unknown = submitted("0x04", None, None, None)
+    unreadable = submitted("0x05", "0xa5", 111, 119)
+    still_open = submitted("0x06", "0xa6", 115, 130)
+    # Submitted before valid_until was recorded: one era from the claim
+    legacy = submitted("0x07", "0xa7", 108 - config.ERA_PERIOD, None)
+
+    chain = {
+        105: [Inclusion("0xa1", 105, "0xb105", 2, True)],
+        106: [Inclusion("0xa7", 106, "0xb106", 3, True)],
+        107: [Inclusion("0xa2", 107, "0xb107", 1, False, "Module.NotEnoughBalance")],
+    }
+    reads = []
+
+    async def read_block(block_num, wanted):
+        reads.append(block_num)
+        if block_num == 115:
+            raise ConnectionError("node gone")
+        return [r for r in chain.get(block_num, []) if r.xt_hash in wanted]
+
+    monkeypatch.setattr(inclusion.tracker, "read_block", read_block)
+
+    async def run() -> int:
+        settled = await staking.recover_submitted()
+        # The open window is left to the tracker
+        assert "0xa6" in staking.in_flight()
+        inclusion.tracker.forget("0xa6")
+        await asyncio.gather(*staking.in_flight().values())
+        return settled
+
+    assert asyncio.run(run()) == 5
+    assert len(reads) == len(set(reads))  # every block read once
+    assert max(reads) == head
+
+    row = ledger.get(landed)
+    assert (row["status"], row["block_hash"]) == (orders.INCLUDED, "0xb105")
+    row = ledger.get(reverted)
+    assert (row["status"], row["error"]) == (orders.FAILED, "Module.NotEnoughBalance")
+    row = ledger.get(expired)
+    assert (row["status"], row["error"]) == (orders.FAILED, "extrinsic not included by block 110")
+    assert ledger.get(unknown)["status"] == orders.FAILED
+    assert ledger.get(unreadable)["status"] == orders.SUBMITTED  # retried next run
+    assert ledger.get(still_open)["status"] == orders.SUBMITTED
+    assert ledger.get(legacy)["status"] == orders.INCLUDED
@@ -0,0 +1,76 @@
+"""A decoded swap's signer must be found in the owner index.
+
+The owner index is keyed by SS58 address (`owners.fetch_owners`), so the
+decoder has to produce SS58 too; a hex account id never matches and the bot
+never stakes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from substrateinterface import Keypair
+
+import config
+import decoder_pool
+import owners
+import rules
+import storage
+
+NETUID = 3
+
+
+@pytest.fixture
+def owner(monkeypatch):
+    """A keypair registered as the owner of subnet `NETUID`, indexed the way
+    the bot indexes owners read from chain."""
+    keypair = Keypair.create_from_uri("//Alice")
+    key = storage.map_key(
+        "SubtensorModule", "SubnetOwner", storage.netuid_key(NETUID), "Identity"
+    )
+
+    async def read_map(pallet, item, *args, **kwargs):
+        return {key: f"0x{keypair.public_key.hex()}"}
+
+    monkeypatch.setattr(storage, "read_map", read_map)
+    monkeypatch.setattr(config, "subnet_coldkeys", {})
+    monkeypatch.setattr(config, "subnet_owners", {})
+    monkeypatch.setattr(owners, "printTG", lambda *args, **kwargs: None)
+    owners.apply(asyncio.run(owners.fetch_owners()))
+    return keypair
+
+
+@pytest.fixture
+def swap_hex(owner, sign_call):
+    new_coldkey = Keypair.create_from_uri("//Bob")
+    return sign_call(
+        owner, "SubtensorModule", "schedule_swap_coldkey",
+        {"new_coldkey": new_coldkey.ss58_address},
+    )
+
+
+def _assert_owner_swap(value: dict, owner: Keypair) -> None:
+    assert value["call"]["call_function"] == "schedule_swap_coldkey"
+    fields = rules.call_fields(value)
+    assert fields["signer"] == owner.ss58_address
+    assert config.subnet_coldkeys.get(fields["signer"]) == [NETUID]
+    rule = rules.parse_rule({
+        "call": "SubtensorModule.schedule_swap_coldkey",
+        "where": {"signer": {"owner": True}},
+        "action": "log",
+    })
+    assert rule.matches(fields)
+
+
+def test_inline_decode_matches_owner_index(rt, owner, swap_hex):
+    _assert_owner_swap(rt.decode(swap_hex), owner)
+
+
+def test_worker_decode_matches_owner_index(rt, metadata_hex, owner, swap_hex, monkeypatch):
+    # Run the worker's initializer and batch decoder in-process
+    monkeypatch.setattr(decoder_pool, "_runtime", None)
+    target = rt.call_index("SubtensorModule", "schedule_swap_coldkey")
+    decoder_pool._init_worker(metadata_hex, config.SS58_FORMAT, rt.extra_layout, [target])
+    [value] = decoder_pool._decode_batch([swap_hex])
+    _assert_owner_swap(value, owner)
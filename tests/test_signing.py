@@ -0,0 +1,44 @@
+"""An extrinsic signed by `SigningContext` decodes back to what was signed."""
+
+from __future__ import annotations
+
+import asyncio
+
+from substrateinterface import Keypair
+
+import rpc
+import runtime
+from signing import SigningContext
+
+NONCE = 5
+BLOCK_HASH = f"0x{'11' * 32}"
+
+
+class _Node:
+    """Answers the reads `SigningContext.sync` makes."""
+
+    async def request(self, method, params=None, **kwargs):
+        return {
+            "chain_getHeader": {"number": hex(100)},
+            "chain_getBlockHash": BLOCK_HASH,
+            "system_accountNextIndex": NONCE,
+        }[method]
+
+
+def test_signed_call_decodes(rt, monkeypatch):
+    monkeypatch.setattr(runtime, "_current", rt)
+    monkeypatch.setattr(rpc, "client", _Node())
+    keypair = Keypair.create_from_uri("//Alice")
+    new_coldkey = Keypair.create_from_uri("//Bob").ss58_address
+
+    context = SigningContext(keypair)
+    asyncio.run(context.sync())
+    call = context.compose_call(
+        "SubtensorModule", "schedule_swap_coldkey", {"new_coldkey": new_coldkey}
+    )
+    value = rt.decode(str(context.sign(call).data))
+
+    assert value["address"] == keypair.ss58_address
+    assert value["nonce"] == NONCE
+    assert value["call"]["call_args"][0]["value"] == new_coldkey
+    assert context.next_nonce() == NONCE + 1
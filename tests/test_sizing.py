@@ -0,0 +1,118 @@
+"""Stake sizing from cached reserves."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+import config
+from reserves import Reserves
+from sizing import SizingTable, size, size_one
+
+TAO = 10**15
+ALPHA = 10**18
+
+
+@pytest.fixture
+def head(monkeypatch):
+    def at(block: int) -> None:
+        monkeypatch.setattr(config, "current_block", block)
+
+    return at
+
+
+def test_row_missing_from_a_refresh_goes_stale(head):
+    table = SizingTable()
+    # Subnet 2 dropped out of the refresh at block 110; its row is from 100
+    table.rebuild(110, {1: Reserves(ALPHA, TAO, 110), 2: Reserves(ALPHA, TAO, 100)})
+    head(110)
+
+    assert table.get(1).block == 110
+    assert table.get(2) is None
+    assert table.get(2, max_age=10).block == 100
+
+
+def test_rows_age_out_with_the_head(head):
+    table = SizingTable()
+    table.rebuild(100, {1: Reserves(ALPHA, TAO, 100)})
+
+    head(100 + config.RESERVE_MAX_AGE_BLOCKS)
+    assert table.get(1) is not None
+    head(101 + config.RESERVE_MAX_AGE_BLOCKS)
+    assert table.get(1) is None
+
+
+def test_unknown_netuid(head):
+    table = SizingTable()
+    assert table.get(1) is None
+    table.rebuild(100, {3: Reserves(ALPHA, TAO, 100)})
+    head(100)
+    assert table.get(1) is None
+    assert table.get(7) is None
+
+
+def test_stake_below_the_slippage_cap():
+    tao, alpha, amount = 100 * 10**9, 400 * 10**9, 6 * 10**9
+    cols = size([tao], [alpha], amount, 2.25)
+
+    assert cols["spot"][0] == 0.25
+    assert cols["max_amount"][0] == tao * (math.sqrt(2.25) - 1)
+    assert cols["amount"][0] == amount
+    assert cols["alpha_out"][0] == alpha * amount // (tao + amount)
+    assert cols["impact"][0] == pytest.approx(amount / tao)
+    assert cols["limit_price"][0] == math.floor(0.25 * 2.25 * config.NANO)
+
+
+def test_stake_capped_at_the_limit_price():
+    tao, alpha = 100 * 10**9, 400 * 10**9
+    cols = size([tao], [alpha], 80 * 10**9, 2.25)
+
+    stake = cols["amount"][0]
+    assert stake == cols["max_amount"][0] == 50 * 10**9
+    # The capped stake moves the price exactly to the signed limit
+    post_trade = (tao + stake) ** 2 / (tao * alpha)
+    assert post_trade == pytest.approx(cols["limit_price"][0] / config.NANO)
+    assert cols["alpha_out"][0] == alpha * stake // (tao + stake)
+
+
+def test_empty_pool():
+    cols = size([0], [0], 6 * 10**9, 1.3)
+    assert cols["spot"][0] == cols["max_amount"][0] == cols["amount"][0] == 0
+    assert cols["alpha_out"][0] == cols["limit_price"][0] == 0
+    assert cols["impact"][0] == np.inf
+
+
+def test_vectorised_matches_one_by_one():
+    tao = [10**12, 3 * 10**9, 0, 7 * 10**13]
+    alpha = [5 * 10**15, 10**12, 10**15, 10**14]
+    cols = size(tao, alpha, config.STAKE_AMOUNT, 1.3)
+    for i, (t, a) in enumerate(zip(tao, alpha)):
+        one = size([t], [a], config.STAKE_AMOUNT, 1.3)
+        for name, values in cols.items():
+            assert values[i] == one[name][0], name
+
+
+def test_size_one_gates(monkeypatch):
+    monkeypatch.setattr(config, "STAKE_AMOUNT", 6 * 10**9)
+    monkeypatch.setattr(config, "MIN_STAKE_AMOUNT", 10**8)
+    monkeypatch.setattr(config, "MIN_POOL_ALPHA", 10**15)
+
+    deep = size_one(1, 100, tao=10**13, alpha=10**16)
+    assert deep.active and deep.amount == 6 * 10**9
+    assert not size_one(1, 100, tao=10**13, alpha=10**15 - 1).active
+    # A shallow pool caps the stake below the minimum worth sending
+    shallow = size_one(1, 100, tao=10**8, alpha=10**16)
+    assert shallow.amount == shallow.max_amount < 10**8
+    assert not shallow.active
+
+
+def test_table_rows_match_size_one(head):
+    rows = {1: Reserves(10**16, 10**13, 100), 4: Reserves(10**14, 10**9, 100)}
+    table = SizingTable()
+    table.rebuild(100, rows)
+    head(100)
+    for netuid, r in rows.items():
+        assert table.get(netuid) == size_one(netuid, r.block, r.tao, r.alpha)
+    assert table.active_netuids() == [1]